@@ -27,12 +27,20 @@ setup(
         "ufo": [
             "ufoLib2>=0.2.1",
         ],
+        "numpy": [
+            "numpy",
+        ],
         "testing": [
             "pytest",
             "pytest-cov",
             "pytest-randomly",
         ],
     },
+    entry_points={
+        "console_scripts": [
+            "tfont-build = tfont.builder:main",
+        ],
+    },
     setup_requires=[
         "setuptools_scm",
     ],
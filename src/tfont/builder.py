@@ -0,0 +1,147 @@
+import argparse
+from copy import deepcopy
+import os
+import sys
+from tfont.converters.otfConverter import OTFConverter
+from tfont.converters.tfontConverter import TFontConverter
+from tfont.util.features import compileFeatures, fontGlyphOrder
+import time
+
+
+class Builder:
+    """
+    Keeps a binary font compiled from *font*, a Font or the path to a .tfont
+    file, up to date at *output*.
+
+    update() rebuilds if the font changed: a Font is checked through its
+    generation, which the change tracking bumps, a file through its
+    modification time. Only glyphs whose outline changed are recompiled
+    (see OTFConverter), and features only if their text or the glyph order
+    did (see compileFeatures()).
+    """
+
+    __slots__ = ("_converter", "_generation", "_mtime", "font", "masterName",
+                 "output", "path")
+
+    def __init__(self, font, output, ttf=True, masterName=None):
+        if isinstance(font, str):
+            self.font = None
+            self.path = font
+        else:
+            self.font = font
+            self.path = None
+        self._converter = OTFConverter(ttf=ttf)
+        self._generation = None
+        self._mtime = None
+        self.masterName = masterName
+        self.output = output
+
+    @property
+    def compiled(self):
+        """
+        The names of the glyphs compiled by the last build.
+        """
+        return self._converter.compiled
+
+    def build(self):
+        """
+        Compiles the font and writes it to the output path, atomically.
+        Returns the TTFont.
+        """
+        if self.path is not None:
+            mtime = os.stat(self.path).st_mtime_ns
+            if self.font is None or mtime != self._mtime:
+                # recorded first, a broken file is retried once it changes
+                self._mtime = mtime
+                self.font = TFontConverter().open(self.path)
+        font = self.font
+        self._generation = font._generation
+        ttFont = self._converter.compile(font, self.masterName)
+        for tag, table in compileFeatures(
+                font.featureText, fontGlyphOrder(font),
+                font.featureCache).items():
+            # compiled tables are shared, and saving modifies them
+            ttFont[tag] = deepcopy(table)
+        tmp = self.output + ".tmp"
+        ttFont.save(tmp)
+        os.replace(tmp, self.output)
+        return ttFont
+
+    def update(self):
+        """
+        Builds if the font changed since the last build, and returns whether
+        it did.
+        """
+        if self.path is not None:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return False
+            if mtime == self._mtime:
+                return False
+        elif self.font._generation == self._generation:
+            return False
+        self.build()
+        return True
+
+    def watch(self, interval=.25, callback=None):
+        """
+        Calls update() every *interval* seconds, forever. If given,
+        callback(error) is called after each build attempt, with the exception
+        raised if it failed (which is then not raised) or None. Failed builds
+        are retried once the font changes again.
+        """
+        while True:
+            try:
+                built = self.update()
+            except Exception as e:
+                if callback is None:
+                    raise
+                callback(e)
+            else:
+                if built and callback is not None:
+                    callback(None)
+            time.sleep(interval)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Compile a .tfont file and keep the binary up to date.")
+    parser.add_argument("input", help="the .tfont file")
+    parser.add_argument("output", nargs="?", help="the binary font path")
+    parser.add_argument(
+        "--cff", action="store_true", help="compile CFF outlines")
+    parser.add_argument("--master", help="the master to compile")
+    parser.add_argument(
+        "--once", action="store_true", help="build once and exit")
+    parser.add_argument(
+        "--interval", type=float, default=.25,
+        help="seconds between checks for changes")
+    options = parser.parse_args(args)
+    output = options.output
+    if output is None:
+        output = os.path.splitext(options.input)[0] + (
+            ".otf" if options.cff else ".ttf")
+    builder = Builder(
+        options.input, output, ttf=not options.cff,
+        masterName=options.master)
+    builder.build()
+    print("built %s" % output)
+    if options.once:
+        return
+
+    def report(error):
+        if error is None:
+            print("built %s (%d glyphs compiled)" % (
+                output, len(builder.compiled)))
+        else:
+            print("error: %s" % error, file=sys.stderr)
+
+    try:
+        builder.watch(options.interval, report)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,3 @@
 from tfont.converters.tfontConverter import TFontConverter
+from tfont.converters.otfConverter import OTFConverter
 from tfont.converters.ufoConverter import UFOConverter
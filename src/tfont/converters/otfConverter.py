@@ -0,0 +1,160 @@
+from copy import deepcopy
+from fontTools.fontBuilder import FontBuilder
+from fontTools.misc.psCharStrings import T2CharString
+from fontTools.pens.boundsPen import BoundsPen
+from fontTools.pens.cu2quPen import Cu2QuPen
+from fontTools.pens.t2CharStringPen import T2CharStringPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib.tables._g_l_y_f import Glyph as TTGlyph
+from hashlib import sha1
+import logging
+from tfont.util.features import fontGlyphOrder
+from tfont.util.outline import outlineHash, outlineVersion
+
+logger = logging.getLogger(__name__)
+
+
+class OTFConverter:
+    """
+    Compiles a Font master into a binary OpenType font, with TrueType
+    outlines (curves converted to quadratic within *maxError* units) or,
+    if *ttf* is false, CFF ones.
+
+    Compiled glyphs are kept per glyph, master and output settings, and
+    reused as long as the layer is unchanged (by version, or by content after
+    e.g. reloading the font), so that compiling again after a few edits only
+    recompiles those glyphs and reassembles the tables. Each compiled font
+    gets its own copy of them.
+    """
+
+    __slots__ = ("_glyphs", "compiled", "maxError", "ttf")
+
+    def __init__(self, ttf=True, maxError=1.0):
+        self._glyphs = {}
+        # names of the glyphs compiled by the last compile() call
+        self.compiled = []
+        self.maxError = maxError
+        self.ttf = ttf
+
+    def _compileGlyph(self, glyphName, layer, glyphNames):
+        # compiled outline and left side bearing, the latter is recomputed by
+        # FontBuilder for TrueType. components of missing glyphs are skipped
+        components = []
+        for component in layer._components:
+            if component.glyphName in glyphNames:
+                components.append(component)
+            else:
+                logger.warning(
+                    "glyph %r: skipping component of missing glyph %r",
+                    glyphName, component.glyphName)
+        if self.ttf:
+            pen = TTGlyphPen(glyphNames, handleOverflowingTransforms=False)
+            cu2quPen = Cu2QuPen(pen, self.maxError, reverse_direction=True)
+            # glyf glyphs can't mix contours and components, and component
+            # scales must fit in F2Dot14
+            decompose = bool(layer._paths) or any(
+                not -2 <= value <= 2 for component in components
+                for value in tuple(component.transformation)[:4])
+            if decompose:
+                layer.draw(cu2quPen, decompose=True)
+            else:
+                for component in components:
+                    cu2quPen.addComponent(
+                        component.glyphName, tuple(component.transformation))
+            return pen.glyph(), None
+        pen = T2CharStringPen(layer.width, None)
+        layer.draw(pen, decompose=True)
+        boundsPen = BoundsPen(None)
+        layer.draw(boundsPen, decompose=True)
+        bounds = boundsPen.bounds
+        return pen.getCharString().program, bounds[0] if bounds else 0
+
+    def _glyph(self, glyphName, layer, glyphNames):
+        key = (glyphName, layer.masterName, self.ttf, self.maxError)
+        version = outlineVersion(layer)
+        entry = self._glyphs.get(key)
+        if entry is not None:
+            oldLayer, oldVersion, digest, data = entry
+            if oldLayer is layer and oldVersion == version:
+                return data
+        newDigest = sha1(("%s-%r" % (
+            outlineHash(layer), layer.width)).encode()).hexdigest()
+        if entry is None or newDigest != digest:
+            data = self._compileGlyph(glyphName, layer, glyphNames)
+            self.compiled.append(glyphName)
+        self._glyphs[key] = (layer, version, newDigest, data)
+        return data
+
+    def clearCache(self):
+        self._glyphs.clear()
+
+    def compile(self, font, masterName=None):
+        """
+        Returns a fontTools TTFont for the given master, the selected master
+        by default.
+        """
+        if masterName is None:
+            masterName = font.selectedMaster.name
+        master = font.masters[masterName]
+        ttf = self.ttf
+        self.compiled = []
+        cmap = {}
+        outlines = {}
+        advances = {}
+        lsbs = {}
+        glyphNames = {glyph.name for glyph in font.glyphs}
+        for glyph in font.glyphs:
+            name = glyph.name
+            layer = glyph.layerForMaster(masterName)
+            for unicode in glyph.unicodes:
+                cmap.setdefault(int(unicode, 16), name)
+            outlines[name], lsbs[name] = self._glyph(
+                name, layer, glyphNames)
+            advances[name] = layer.width
+        if ".notdef" not in outlines:
+            advances[".notdef"] = lsbs[".notdef"] = 0
+            outlines[".notdef"] = TTGlyph() if ttf else ["endchar"]
+        glyphOrder = fontGlyphOrder(font)
+        builder = FontBuilder(font.unitsPerEm, isTTF=ttf)
+        builder.setupGlyphOrder(glyphOrder)
+        builder.setupCharacterMap(cmap)
+        familyName = font.familyName or "Untitled"
+        styleName = master.name or "Regular"
+        psName = ("%s-%s" % (familyName, styleName)).replace(" ", "")
+        if ttf:
+            # cached glyphs are modified when compiled
+            builder.setupGlyf(deepcopy(outlines))
+            glyf = builder.font["glyf"]
+            for name in glyphOrder:
+                lsbs[name] = getattr(glyf[name], "xMin", 0)
+        else:
+            builder.setupCFF(psName, {"FullName": "%s %s" % (
+                familyName, styleName)}, {
+                    name: T2CharString(program=list(program))
+                    for name, program in outlines.items()}, {})
+        builder.setupHorizontalMetrics({
+            name: (round(advances[name]), round(lsbs[name]))
+            for name in glyphOrder})
+        ascender, descender = master.ascender, master.descender
+        builder.setupHorizontalHeader(ascent=ascender, descent=descender)
+        nameStrings = {
+            "familyName": familyName,
+            "styleName": styleName,
+            "psName": psName,
+            "version": "Version %d.%03d" % (
+                font.versionMajor, font.versionMinor),
+        }
+        for key in ("copyright", "designer", "manufacturer"):
+            value = getattr(font, key)
+            if value:
+                nameStrings[key] = value
+        builder.setupNameTable(nameStrings)
+        builder.setupOS2(
+            sTypoAscender=ascender, sTypoDescender=descender,
+            usWinAscent=max(ascender, 0), usWinDescent=max(-descender, 0),
+            sxHeight=master.xHeight, sCapHeight=master.capHeight)
+        builder.setupPost(italicAngle=master.italicAngle)
+        return builder.font
+
+    def save(self, font, path, masterName=None):
+        self.compile(font, masterName).save(path)
@@ -13,6 +13,7 @@ from tfont.objects.master import Master
 from tfont.objects.misc import AlignmentZone, Transformation
 from tfont.objects.path import Path
 from tfont.objects.point import Point
+from tfont.util.kerning import KerningTable
 from typing import Dict, Union
 
 
@@ -42,6 +43,12 @@ def _structure_Path(data, cls):
     return path
 
 
+def _structure_Path_compact(data, cls):
+    path = _structure_Path(data, cls)
+    path.compact()
+    return path
+
+
 def _unstructure_Path(path):
     data = []
     for point in path._points:
@@ -87,7 +94,7 @@ class TFontConverter(cattr.Converter):
 
     version = 0
 
-    def __init__(self, indent=0, **kwargs):
+    def __init__(self, indent=0, compact=False, **kwargs):
         super().__init__(**kwargs)
         self._indent = indent
 
@@ -110,7 +117,10 @@ class TFontConverter(cattr.Converter):
         self.register_structure_hook(AlignmentZone, structure_seq)
         self.register_unstructure_hook(AlignmentZone, unstructure_seq)
         # Path
-        self.register_structure_hook(Path, _structure_Path)
+        if compact:
+            self.register_structure_hook(Path, _structure_Path_compact)
+        else:
+            self.register_structure_hook(Path, _structure_Path)
         if indent is None:
             self.register_unstructure_hook(Path, _unstructure_Path_base)
         else:
@@ -141,6 +151,8 @@ class TFontConverter(cattr.Converter):
         # Master
         self.register_structure_hook(Dict[str, Master], structure_dict_name)
         self.register_unstructure_hook(Dict[str, Master], unstructure_seq_dict)
+        self.register_unstructure_hook(
+            KerningTable, lambda table: table.toDict())
 
     def open(self, path, font=None):
         with open(path, 'r') as file:
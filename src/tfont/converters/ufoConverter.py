@@ -1,14 +1,12 @@
 import cattr
 from datetime import datetime
 from tfont.objects.anchor import Anchor
-from tfont.objects.component import Component
 from tfont.objects.feature import FeatureHeader
 from tfont.objects.font import Font
 from tfont.objects.glyph import Glyph
 from tfont.objects.layer import Layer
 from tfont.objects.guideline import Guideline
-from tfont.objects.misc import AlignmentZone, Transformation
-from tfont.objects.path import Path
+from tfont.objects.misc import AlignmentZone
 from typing import Union
 
 try:
@@ -155,16 +153,6 @@ class UFOConverter(cattr.Converter):
                         continue
                     anchors[a.name] = Anchor(a.x or 0, a.y or 0)
                     # ufo color and identifier are skipped
-                # components
-                components = layer.components
-                for c in g.components:
-                    component = Component(c.baseGlyph)
-                    if c.transformation:
-                        component.transformation = Transformation(
-                            *tuple(c.transformation)
-                        )
-                    # ufo identifier is skipped
-                    components.append(component)
                 # guidelines
                 guidelines = layer.guidelines
                 for g_ in g.guidelines:
@@ -173,28 +161,11 @@ class UFOConverter(cattr.Converter):
                         guideline.name = g_.name
                     # ufo color and identifier are skipped
                     guidelines.append(guideline)
-                # paths
-                paths = layer.paths
-                for c in self.unstructure(g.contours):
-                    pts = c.pop("points")
-                    for p in pts:
-                        name = p.pop("name", None)
-                        ident = p.pop("identifier", None)
-                        if name or ident:
-                            p["extraData"] = d = {}
-                            if name:
-                                d["name"] = name
-                            if ident:
-                                d["id"] = ident
-                    while pts[-1]["type"] is None:
-                        pts.insert(0, pts.pop())
-                    c["points"] = pts
-                    ident = c.pop("identifier", None)
-                    if ident:
-                        c["id"] = ident
-                    path = self.structure(c, Path)
-                    paths.append(path)
-                glyph._lastModified = None
+                # paths and components
+                with layer.getPointPen() as pen:
+                    g.drawPoints(pen)
+                # versions only go up, loading sets the unmodified mark
+                glyph._loadedVersion = glyph._version
         return font
 
     def save(self, font, path):
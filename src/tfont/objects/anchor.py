@@ -1,6 +1,5 @@
 import attr
-from tfont.util.tracker import obj_setattr
-from time import time
+from tfont.util.tracker import bumpLayer, obj_setattr
 from typing import Optional, Union
 
 
@@ -39,7 +38,6 @@ class Anchor:
                     else:
                         if self.selected:
                             layer._selectionBounds = None
-                        glyph = layer._parent
-                        glyph._lastModified = time()
+                        bumpLayer(layer)
                 return
         obj_setattr(self, key, value)
@@ -1,6 +1,8 @@
 import attr
 from tfont.objects.misc import Transformation, obj_setattr
-from time import time
+from tfont.util.draw import drawContour, drawPointsContour, pointContours
+from tfont.util.outline import componentContours, contoursPaths
+from tfont.util.tracker import bumpLayer
 from typing import Optional
 
 
@@ -36,9 +38,8 @@ class Component:
                             layer._selection.remove(self)
                         layer._selectionBounds = None
                     else:
-                        glyph = layer._parent
                         layer._bounds = layer._selectionBounds = None
-                        glyph._lastModified = time()
+                        bumpLayer(layer)
                 return
         obj_setattr(self, key, value)
 
@@ -92,4 +93,23 @@ class Component:
         return self.transformation.transform(0, 0)
 
     def decompose(self):
-        raise NotImplementedError
+        layer = self._parent
+        if layer is None:
+            raise ValueError("cannot decompose a component without layer")
+        layer.paths.extend(contoursPaths(componentContours(self)))
+        layer.components.remove(self)
+
+    def draw(self, pen):
+        """
+        Draws the component outline, nested components resolved, into a
+        segment pen. Outlines are cached, see componentContours().
+        """
+        for points, types, _ in pointContours(componentContours(self)):
+            drawContour(pen, points, types)
+
+    def drawPoints(self, pointPen):
+        """
+        Draws the component outline into a point pen, as draw() does.
+        """
+        for contour in pointContours(componentContours(self)):
+            drawPointsContour(pointPen, *contour)
@@ -27,6 +27,7 @@ class Feature:
                         return
                     obj_setattr(self, key, value)
                     font._layoutEngine = None
+                    font._generation += 1
                 return
         obj_setattr(self, key, value)
 
@@ -64,6 +65,7 @@ class FeatureClass:
                         return
                     obj_setattr(self, key, value)
                     font._layoutEngine = None
+                    font._generation += 1
                 return
         obj_setattr(self, key, value)
 
@@ -97,6 +99,7 @@ class FeatureHeader:
                 if value != oldValue:
                     obj_setattr(self, key, value)
                     font._layoutEngine = None
+                    font._generation += 1
                 return
         obj_setattr(self, key, value)
 
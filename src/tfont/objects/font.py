@@ -5,9 +5,15 @@ from tfont.objects.feature import Feature, FeatureClass, FeatureHeader
 from tfont.objects.glyph import Glyph
 from tfont.objects.instance import Instance
 from tfont.objects.master import Master, fontMasterDict
+from tfont.util.cache import LRUCache
+from tfont.util.features import LayoutEngine
+from tfont.util.outline import decomposedPaths
+from tfont.util.scale import scaleGlyph, scaleMaster
+from tfont.util.shaping import DEFAULT_FEATURES, shapeText
 from tfont.util.tracker import (
     FontAxesDict, FontFeaturesDict, FontFeatureClassesDict,
-    FontFeatureHeadersList, FontGlyphsList, FontInstancesList, FontMastersDict)
+    FontFeatureHeadersList, FontGlyphsList, FontInstancesList, FontMastersDict,
+    obj_setattr)
 from typing import Any, Dict, List, Optional
 
 
@@ -37,9 +43,15 @@ class Font:
     _extraData: Optional[Dict] = attr.ib(default=None)
 
     _cmap: Optional[Dict[int, int]] = attr.ib(default=None, init=False)
+    _featureCache: Optional[Any] = attr.ib(default=None, init=False)
+    _generation: int = attr.ib(default=0, init=False)
+    _glyphIds: Optional[Dict[str, int]] = attr.ib(default=None, init=False)
+    _graphicsPathCache: Optional[Any] = attr.ib(default=None, init=False)
     _layoutEngine: Optional[Any] = attr.ib(default=None, init=False)
     _modified: bool = attr.ib(default=False, init=False)
+    _outlineCache: Optional[Any] = attr.ib(default=None, init=False)
     _selectedMaster: Optional[str] = attr.ib(default=None, init=False)
+    _shapingCache: Optional[Any] = attr.ib(default=None, init=False)
 
     def __attrs_post_init__(self):
         for axis in self._axes.values():
@@ -62,6 +74,14 @@ class Font:
             self.__class__.__name__, self.familyName, self.versionMajor,
             self.versionMinor, len(self._masters), len(self._instances))
 
+    def __setattr__(self, key, value):
+        obj_setattr(self, key, value)
+        if key[0] != "_":
+            try:
+                obj_setattr(self, "_generation", self._generation + 1)
+            except AttributeError:
+                pass
+
     @property
     def axes(self):
         return FontAxesDict(self)
@@ -85,10 +105,54 @@ class Font:
     def featureHeaders(self):
         return FontFeatureHeadersList(self)
 
+    @property
+    def featureText(self):
+        """
+        The feature code of the font: headers, classes then features.
+        """
+        return "\n\n".join(str(obj) for obj in (
+            *self._featureHeaders, *self._featureClasses.values(),
+            *self._features.values()))
+
+    @property
+    def generation(self):
+        return self._generation
+
+    @property
+    def featureCache(self):
+        """
+        The LRUCache that holds the layout tables compiled from the font
+        feature code (see compileFeatures()), 4 entries by default.
+        """
+        cache = self._featureCache
+        if cache is None:
+            cache = self._featureCache = LRUCache(4)
+        return cache
+
+    @featureCache.setter
+    def featureCache(self, value):
+        self._featureCache = value
+
     @property
     def glyphs(self):
         return FontGlyphsList(self)
 
+    @property
+    def graphicsPathCache(self):
+        """
+        The LRUCache that holds the graphics paths of the font layers and
+        paths, 4096 entries by default. Assign a new one to change its
+        budget.
+        """
+        cache = self._graphicsPathCache
+        if cache is None:
+            cache = self._graphicsPathCache = LRUCache(4096)
+        return cache
+
+    @graphicsPathCache.setter
+    def graphicsPathCache(self, value):
+        self._graphicsPathCache = value
+
     @property
     def instances(self):
         return FontInstancesList(self)
@@ -110,11 +174,26 @@ class Font:
         # undo will challenge that assumption,
         if not modified:
             for glyph in self._glyphs:
-                if glyph._lastModified is not None:
+                if glyph._version != glyph._loadedVersion:
                     modified = self._modified = True
                     break
         return modified
 
+    @property
+    def outlineCache(self):
+        """
+        The LRUCache that holds resolved component outlines (see
+        Component.decompose()), 4096 entries by default.
+        """
+        cache = self._outlineCache
+        if cache is None:
+            cache = self._outlineCache = LRUCache(4096)
+        return cache
+
+    @outlineCache.setter
+    def outlineCache(self, value):
+        self._outlineCache = value
+
     @property
     def selectedMaster(self):
         try:
@@ -124,10 +203,39 @@ class Font:
             self._selectedMaster = master.name
             return master
 
+    @property
+    def shapingCache(self):
+        """
+        The LRUCache that holds the runs returned by shape(), 256 entries by
+        default.
+        """
+        cache = self._shapingCache
+        if cache is None:
+            cache = self._shapingCache = LRUCache(256)
+        return cache
+
+    @shapingCache.setter
+    def shapingCache(self, value):
+        self._shapingCache = value
+
+    def decomposeComponents(self):
+        """
+        Decomposes the components of all layers. Outlines are all resolved
+        first, so that glyphs used as components are decomposed from their
+        original outline, then the layers are updated.
+        """
+        layers = [
+            layer for glyph in self._glyphs for layer in glyph._layers
+            if layer._components]
+        results = [decomposedPaths(layer) for layer in layers]
+        for layer, paths in zip(layers, results):
+            layer.paths.extend(paths)
+            del layer.components[:]
+
     def glyphForName(self, name):
-        for glyph in self._glyphs:
-            if glyph.name == name:
-                return glyph
+        gid = self.glyphIdForName(name)
+        if gid is not None:
+            return self._glyphs[gid]
 
     def glyphForUnicode(self, value):
         gid = self.glyphIdForCodepoint(int(value, 16))
@@ -147,6 +255,62 @@ class Font:
 
     # maybe we could only have glyphForName and inline this func
     def glyphIdForName(self, name):
-        for index, glyph in enumerate(self._glyphs):
-            if glyph.name == name:
-                return index
+        cache = self._glyphIds
+        if cache is None:
+            cache = self._glyphIds = {}
+            for index, glyph in enumerate(self._glyphs):
+                cache.setdefault(glyph.name, index)
+        return cache.get(name)
+
+    def layoutEngineFactory(self):
+        return LayoutEngine(self)
+
+    def shape(self, text, masterName=None, features=DEFAULT_FEATURES):
+        """
+        Shapes text in the given master, the selected one by default, and
+        returns (glyphIds, advances, offsets) tuples; see shapeText().
+
+        Runs are cached by text, master and features, an entry holds until
+        the layout engine (or the cmap, without features) is rebuilt, the
+        master kerning changes or one of the glyphs it uses changes.
+        """
+        if masterName is None:
+            masterName = self.selectedMaster.name
+        features = tuple(features)
+        if features:
+            layout = self.layoutEngine
+        else:
+            # reset along with the layout engine, without building it
+            self.glyphIdForCodepoint(0)
+            layout = self._cmap
+        version = layout, self._masters[masterName]._kerningVersion
+        cache = self.shapingCache
+        key = (text, masterName, features)
+
+        def factory():
+            glyphIds, advances, offsets, glyphs = shapeText(
+                self, text, masterName, features)
+            versions = tuple(glyph._version for glyph in glyphs)
+            return glyphIds, advances, offsets, glyphs, versions
+
+        entry = cache.fetch(key, factory, version)
+        if any(glyph._version != glyphVersion
+               for glyph, glyphVersion in zip(entry[3], entry[4])):
+            cache.pop(key)
+            entry = cache.fetch(key, factory, version)
+        return entry[:3]
+
+    def scaleUnitsPerEm(self, value, round=True):
+        """
+        Scales all glyphs and masters to a new unitsPerEm value. Glyphs are
+        updated one layer at a time in bulk.
+        """
+        factor = value / self.unitsPerEm
+        if factor == 1:
+            return
+        for glyph in self._glyphs:
+            scaleGlyph(glyph, factor, round)
+        for master in self._masters.values():
+            scaleMaster(master, factor, round)
+        self.unitsPerEm = value
+        self._generation += 1
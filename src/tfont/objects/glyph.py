@@ -22,7 +22,10 @@ class Glyph:
     _extraData: Optional[Dict] = attr.ib(default=None)
 
     _lastModified: Optional[float] = attr.ib(default=None, init=False)
+    _lastModifiedVersion: int = attr.ib(default=0, init=False)
+    _loadedVersion: int = attr.ib(default=0, init=False)
     _parent: Optional[Any] = attr.ib(default=None, init=False)
+    _version: int = attr.ib(default=0, init=False)
     selected: bool = attr.ib(default=False, init=False)
 
     def __attrs_post_init__(self):
@@ -44,7 +47,10 @@ class Glyph:
                 oldValue = getattr(self, key)
                 if value != oldValue:
                     obj_setattr(self, key, value)
-                    self._lastModified = time()
+                    obj_setattr(self, "_version", self._version + 1)
+                    if key == "name" or key == "unicodes":
+                        font._cmap = font._glyphIds = font._layoutEngine = None
+                    font._generation += 1
                 return
         obj_setattr(self, key, value)
 
@@ -61,6 +67,14 @@ class Glyph:
 
     @property
     def lastModified(self):
+        version = self._version
+        if version == self._loadedVersion:
+            return None
+        # the wall-clock time is only resolved when asked for, the first time
+        # after a change
+        if version != self._lastModifiedVersion:
+            self._lastModified = time()
+            self._lastModifiedVersion = version
         return self._lastModified
 
     @property
@@ -74,6 +88,10 @@ class Glyph:
             return unicodes[0]
         return None
 
+    @property
+    def version(self):
+        return self._version
+
     def layerForMaster(self, master):
         if master is None:
             font = self._parent
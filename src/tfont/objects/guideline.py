@@ -1,6 +1,5 @@
 import attr
-from tfont.util.tracker import obj_setattr
-from time import time
+from tfont.util.tracker import bumpLayer, obj_setattr
 from typing import Any, Optional, Union
 
 
@@ -40,8 +39,7 @@ class Guideline(object):
                         # selection bounds, tbh
                         if (key == "x" or key == "y") and self.selected:
                             parent._selectionBounds = None
-                        glyph = parent._parent
-                        glyph._lastModified = time()
+                        bumpLayer(parent)
                 return
         obj_setattr(self, key, value)
 
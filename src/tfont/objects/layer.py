@@ -1,16 +1,38 @@
+from array import array
 import attr
 from datetime import datetime
 from functools import partial
+from itertools import count
 from tfont.objects.anchor import Anchor
 from tfont.objects.component import Component
 from tfont.objects.guideline import Guideline
 from tfont.objects.misc import Transformation, obj_setattr
 from tfont.objects.path import Path
+from tfont.util import bezierMath
+from tfont.util.bounds import pathsBounds
+from tfont.util.coordinates import coordinatesArray, flatCoordinates
+from tfont.util.outline import decomposedPaths
+from tfont.util.pens import LayerPen, LayerPointPen
+from tfont.util.pointArray import PointProxy
 from tfont.util.slice import slicePaths
+from tfont.util.spatialIndex import SpatialIndex
 from tfont.util.tracker import (
-    LayerAnchorsDict, LayerComponentsList, LayerGuidelinesList, LayerPathsList)
-from time import time
+    LayerAnchorsDict, LayerComponentsList, LayerGuidelinesList, LayerPathsList,
+    bumpGlyph)
+from tfont.util.winding import WINDING_TOLERANCE, polylinesWindings
 from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from weakref import ref
+
+# Layer._serial values
+_serials = count()
+
+
+def _setSelected(element, value):
+    # no change tracking, the caller updates the layer
+    if element.__class__ is PointProxy:
+        element._setSelected(value)
+    else:
+        obj_setattr(element, "selected", value)
 
 
 def squaredDistance(x1, y1, item):
@@ -41,12 +63,16 @@ class Layer:
     _extraData: Optional[Dict] = attr.ib(default=None)
 
     _bounds: Optional[Tuple] = attr.ib(default=None, init=False)
-    _closedGraphicsPath: Optional[Any] = attr.ib(default=None, init=False)
-    _openGraphicsPath: Optional[Any] = attr.ib(default=None, init=False)
+    _graphicsPaths: Optional[Dict] = attr.ib(default=None, init=False)
     _parent: Optional[Any] = attr.ib(default=None, init=False)
     _selectedPaths: Optional[Any] = attr.ib(default=None, init=False)
     _selection: Set = attr.ib(default=attr.Factory(set), init=False)
     _selectionBounds: Optional[Tuple] = attr.ib(default=None, init=False)
+    # unique for the process, unlike id()
+    _serial: int = attr.ib(
+        default=attr.Factory(lambda: next(_serials)), init=False)
+    _spatialIndex: Optional[Any] = attr.ib(default=None, init=False)
+    _version: int = attr.ib(default=0, init=False)
     _visible: bool = attr.ib(default=False, init=False)
 
     def __attrs_post_init__(self):
@@ -83,7 +109,8 @@ class Layer:
                 oldValue = getattr(self, key)
                 if value != oldValue:
                     obj_setattr(self, key, value)
-                    glyph._lastModified = time()
+                    obj_setattr(self, "_version", self._version + 1)
+                    bumpGlyph(glyph)
                 return
         obj_setattr(self, key, value)
 
@@ -119,9 +146,8 @@ class Layer:
         left = None
         if bounds is None:
             # TODO: we could have a rect type, in tools
-            paths = self._paths
-            for path in paths:
-                l, b, r, t = path.bounds
+            # uncached path bounds are computed in one go
+            for l, b, r, t in filter(None, pathsBounds(self._paths)):
                 if left is None:
                     left, bottom, right, top = l, b, r, t
                 else:
@@ -162,11 +188,7 @@ class Layer:
 
     @property
     def closedGraphicsPath(self):
-        graphicsPath = self._closedGraphicsPath
-        if graphicsPath is None:
-            graphicsPath = self._closedGraphicsPath = \
-                self.closedGraphicsPathFactory()
-        return graphicsPath
+        return self._graphicsPath("closed", self.closedGraphicsPathFactory)
 
     @property
     def components(self):
@@ -238,11 +260,7 @@ class Layer:
 
     @property
     def openGraphicsPath(self):
-        graphicsPath = self._openGraphicsPath
-        if graphicsPath is None:
-            graphicsPath = self._openGraphicsPath = \
-                self.openGraphicsPathFactory()
-        return graphicsPath
+        return self._graphicsPath("open", self.openGraphicsPathFactory)
 
     @property
     def paths(self):
@@ -319,6 +337,13 @@ class Layer:
             return (left, bottom, right, top)
         return selectionBounds
 
+    @property
+    def spatialIndex(self):
+        spatialIndex = self._spatialIndex
+        if spatialIndex is None or spatialIndex.version != self._version:
+            spatialIndex = self._spatialIndex = SpatialIndex(self)
+        return spatialIndex
+
     @property
     def topMargin(self):
         bounds = self.bounds
@@ -345,6 +370,10 @@ class Layer:
         self.yOrigin = top + value
         self.height += value - oldValue
 
+    @property
+    def version(self):
+        return self._version
+
     @property
     def visible(self):
         if self.masterLayer:
@@ -358,12 +387,79 @@ class Layer:
         else:
             self._visible = value
 
+    def _graphicsPath(self, kind, factory):
+        version = self._version
+        font = self.font
+        if font is not None:
+            # factories are the miss handler of the bounded font cache, keyed
+            # by id so entries don't keep the layer alive, the weakref in the
+            # version tells a layer from a later one with the same id
+            return font.graphicsPathCache.fetch(
+                (id(self), kind), factory, (version, ref(self)))
+        graphicsPaths = self._graphicsPaths
+        if graphicsPaths is None:
+            graphicsPaths = self._graphicsPaths = {}
+        entry = graphicsPaths.get(kind)
+        if entry is None or entry[0] != version:
+            entry = graphicsPaths[kind] = (version, factory())
+        return entry[1]
+
+    def _windings(self, points):
+        windings = polylinesWindings([
+            path.flatten(WINDING_TOLERANCE) for path in self._paths
+            if not path.open], points)
+        for component in self._components:
+            layer = component.layer
+            if layer is None:
+                continue
+            # bring the points into the component layer
+            t = component.transformation
+            determinant = t.xScale * t.yScale - t.xyScale * t.yxScale
+            if not determinant:
+                continue
+            local = []
+            for x, y in points:
+                x, y = x - t.xOffset, y - t.yOffset
+                local.append((
+                    (x * t.yScale - y * t.yxScale) / determinant,
+                    (y * t.xScale - x * t.xyScale) / determinant))
+            # mirroring reverses the contours
+            sign = 1 if determinant > 0 else -1
+            for index, winding in enumerate(layer._windings(local)):
+                windings[index] += sign * winding
+        return windings
+
     def clearSelection(self):
         for element in list(self._selection):
             element.selected = False
         for guideline in self.master.guidelines:
             guideline.selected = False
 
+    def contains(self, x, y):
+        """
+        Returns whether x, y is inside the layer outline, components
+        included, with the nonzero winding rule.
+        """
+        return self._windings(((x, y),))[0] != 0
+
+    def containsPoints(self, points):
+        """
+        Returns whether each x, y of *points* is inside the layer outline, as
+        contains() does, in one batch.
+        """
+        return [winding != 0 for winding in self._windings(list(points))]
+
+    def coordinates(self):
+        """
+        Returns the coordinates of all path points, in paths order, as an
+        (N, 2) array of floats (a NumPy array if available, otherwise a
+        memoryview).
+        """
+        coords = array("d")
+        for path in self._paths:
+            coords.extend(path._flatCoordinates())
+        return coordinatesArray(coords)
+
     def copy(self):
         global TFontConverter
         try:
@@ -377,20 +473,196 @@ class Layer:
         return l
 
     def decomposeComponents(self):
+        if not self._components:
+            return
+        self.paths.extend(decomposedPaths(self))
+        del self.components[:]
+
+    def draw(self, pen, decompose=False):
+        """
+        Draws the layer into a segment pen. Components are passed on to
+        pen.addComponent(), or drawn as outlines if *decompose* is true.
+        """
+        for path in self._paths:
+            path.draw(pen)
         for component in self._components:
-            component.decompose()
+            if decompose:
+                component.draw(pen)
+            else:
+                pen.addComponent(
+                    component.glyphName, tuple(component.transformation))
+
+    def drawPoints(self, pointPen, decompose=False):
+        """
+        Draws the layer into a point pen, as draw() does.
+        """
+        for path in self._paths:
+            path.drawPoints(pointPen)
+        for component in self._components:
+            if decompose:
+                component.drawPoints(pointPen)
+            else:
+                pointPen.addComponent(
+                    component.glyphName, tuple(component.transformation))
+
+    def flatten(self, tolerance=.5):
+        """
+        Returns the polylines of Path.flatten() for each path.
+        """
+        return [path.flatten(tolerance) for path in self._paths]
+
+    def getPen(self):
+        """
+        Returns a fontTools segment pen that adds outlines to the layer, see
+        getPointPen().
+        """
+        return LayerPen(self)
+
+    def getPointPen(self):
+        """
+        Returns a fontTools point pen that adds outlines to the layer, in
+        bulk: paths are built point by point without change tracking, and
+        added when the pen is closed, notifying the layer once. Use it as a
+        context manager, or call its close() method.
+        """
+        return LayerPointPen(self)
 
     # components=False?
     def intersectLine(self, x1, y1, x2, y2):
         intersections = [(x1, y1), (x2, y2)]
         intersections_append = intersections.append
+        lineIntersectsRect = bezierMath.lineIntersectsRect
         for path in self._paths:
-            for segment in path.segments:
+            # only solve for segments whose box the line crosses
+            bounds = path.bounds
+            if bounds is None or not lineIntersectsRect(
+                    x1, y1, x2, y2, *bounds):
+                continue
+            for segment, box in zip(path.segments, path._segmentBoxes()):
+                if not lineIntersectsRect(x1, y1, x2, y2, *box):
+                    continue
                 for x, y, _ in segment.intersectLine(x1, y1, x2, y2):
                     intersections_append((x, y))
         intersections.sort(key=partial(squaredDistance, x1, y1))
         return intersections
 
+    def nearestPoint(self, x, y, radius):
+        """
+        Returns the path point or anchor nearest to x, y within *radius*, or
+        None.
+        """
+        return self.spatialIndex.nearestPoint(x, y, radius)
+
+    def nearestSegment(self, x, y, maxDistance=None):
+        """
+        Returns (segment, x, y, t) for the projection of point x, y on the
+        nearest path segment, or None if there's none within *maxDistance*.
+        All segments are projected in one batch.
+        """
+        lines, lineSegments = array("d"), []
+        curves, curveSegments = array("d"), []
+        for path in self._paths:
+            for segment in path.segments:
+                coords = segment.coordinates
+                coords_len = len(coords)
+                if coords_len == 4:
+                    lines.extend(coords)
+                    lineSegments.append(segment)
+                elif coords_len == 8:
+                    curves.extend(coords)
+                    curveSegments.append(segment)
+        nearest = None
+        minSqDist = maxDistance * maxDistance if maxDistance is not None \
+            else float("inf")
+        for segments, projections in (
+                (lineSegments, bezierMath.linesProjection(x, y, lines)),
+                (curveSegments, bezierMath.curvesProjection(x, y, curves))):
+            for segment, (px, py, t, sqDist) in zip(segments, projections):
+                if sqDist <= minSqDist:
+                    minSqDist = sqDist
+                    nearest = segment, px, py, t
+        return nearest
+
+    def pointsInRect(self, rect):
+        """
+        Returns the path points and anchors within rect, given as (left,
+        bottom, right, top).
+        """
+        return self.spatialIndex.pointsInRect(rect)
+
+    def segmentsNear(self, x, y, radius):
+        """
+        Returns the path segments that pass within *radius* of x, y, nearest
+        first.
+        """
+        return self.spatialIndex.segmentsNear(x, y, radius)
+
+    def selectInRect(self, rect, mode="replace"):
+        """
+        Selects the path points and anchors within rect, given as (left,
+        bottom, right, top). *mode* is "replace", "add" or "toggle".
+
+        The selection is updated in bulk and selectionBounds is kept up to
+        date rather than recomputed.
+        """
+        if mode not in ("replace", "add", "toggle"):
+            raise ValueError("unknown selection mode %r" % mode)
+        selection = self._selection
+        hits = [
+            (container[index], x, y) for container, index, x, y in
+            self.spatialIndex.itemsInRect(rect)]
+        bounds = self._selectionBounds
+        if mode == "replace":
+            hitElements = set(element for element, _, _ in hits)
+            for element in selection:
+                if element not in hitElements:
+                    _setSelected(element, False)
+            selection.clear()
+            bounds = None
+        elif bounds is None and selection:
+            # stale, leave it to selectionBounds
+            bounds = False
+        for element, x, y in hits:
+            if mode == "toggle" and element.selected:
+                _setSelected(element, False)
+                selection.discard(element)
+                if bounds and not (
+                        bounds[0] < x < bounds[2] and
+                        bounds[1] < y < bounds[3]):
+                    # on the edge, can't tell
+                    bounds = False
+                continue
+            _setSelected(element, True)
+            selection.add(element)
+            if bounds is False:
+                continue
+            if bounds is None:
+                bounds = (x, y, x, y)
+            else:
+                left, bottom, right, top = bounds
+                bounds = (
+                    min(left, x), min(bottom, y), max(right, x),
+                    max(top, y))
+        self._selectedPaths = None
+        self._selectionBounds = bounds or None
+
+    def setCoordinates(self, coordinates):
+        """
+        Sets the coordinates of all path points from an (N, 2) array-like, as
+        returned by coordinates(). Notifies once per path.
+        """
+        coords = flatCoordinates(coordinates)
+        paths = self._paths
+        size = sum(len(path._points) for path in paths)
+        if len(coords) != 2 * size:
+            raise ValueError("expected %d points, got %d" % (
+                size, len(coords) // 2))
+        start = 0
+        for path in paths:
+            end = start + 2 * len(path._points)
+            path._setFlatCoordinates(coords[start:end])
+            start = end
+
     def sliceLine(self, x1, y1, x2, y2):
         paths = self._paths
         if not paths:
@@ -407,7 +679,7 @@ class Layer:
         anchors = self._anchors
         if anchors:
             if transformation.transformSequence(
-                    anchors, selectionOnly=selectionOnly):
+                    anchors.values(), selectionOnly=selectionOnly):
                 self.anchors.applyChange()
                 changed = True
         for component in self._components:
@@ -415,7 +687,27 @@ class Layer:
             changed |= doTransform
             if doTransform:
                 component.transformation.concat(transformation)
-        for path in self._paths:
-            changed |= path.transform(
-                transformation, selectionOnly=selectionOnly)
-        return changed
+        paths = [path for path in self._paths if path._points]
+        if not (paths and transformation):
+            return changed
+        # transform the coordinates of all paths at once, then write them
+        # back, notifying once per path
+        if selectionOnly:
+            mask = bytearray()
+            for path in paths:
+                mask.extend(path._selectionMask())
+            if not any(mask):
+                return changed
+        else:
+            mask = None
+        coords = array("d")
+        for path in paths:
+            coords.extend(path._flatCoordinates())
+        transformation.transformCoordinates(coords, mask)
+        start = 0
+        for path in paths:
+            size = len(path._points)
+            if mask is None or any(mask[start:start+size]):
+                path._setFlatCoordinates(coords[2*start:2*(start+size)])
+            start += size
+        return True
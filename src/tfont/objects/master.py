@@ -1,6 +1,7 @@
 import attr
 from tfont.objects.guideline import Guideline
 from tfont.objects.misc import AlignmentZone
+from tfont.util.kerning import KerningTable
 from tfont.util.tracker import MasterGuidelinesList, obj_setattr
 from typing import Any, Dict, List, Optional
 
@@ -21,9 +22,13 @@ class Master:
     xHeight: int = attr.ib(default=500)
 
     _guidelines: List[Guideline] = attr.ib(default=attr.Factory(list))
-    hKerning: Dict[str, Dict[str, int]] = attr.ib(default=attr.Factory(dict))
-    vKerning: Dict[str, Dict[str, int]] = attr.ib(default=attr.Factory(dict))
+    # stored as KerningTable
+    hKerning: Dict[str, Dict[str, int]] = attr.ib(
+        default=attr.Factory(KerningTable))
+    vKerning: Dict[str, Dict[str, int]] = attr.ib(
+        default=attr.Factory(KerningTable))
 
+    _kerningVersion: int = attr.ib(default=0, init=False)
     _parent: Optional[Any] = attr.ib(default=None, init=False)
     visible: bool = attr.ib(default=False, init=False)
 
@@ -44,14 +49,32 @@ class Master:
         try:
             font = self._parent
         except AttributeError:
-            pass
-        else:
-            if font is not None and key == "name":
+            font = None
+        if key == "hKerning" or key == "vKerning":
+            if value.__class__ is not KerningTable or \
+                    value._parent is not None:
+                value = KerningTable(value)
+            try:
                 oldValue = getattr(self, key)
-                if value != oldValue:
-                    font.masters[value] = self
-                return
-        obj_setattr(self, key, value)
+            except AttributeError:
+                pass
+            else:
+                oldValue._parent = None
+            value._parent = self
+            obj_setattr(self, key, value)
+            try:
+                obj_setattr(self, "_kerningVersion", self._kerningVersion + 1)
+            except AttributeError:
+                pass
+        elif font is not None and key == "name":
+            oldValue = getattr(self, key)
+            if value != oldValue:
+                font.masters[value] = self
+            return
+        else:
+            obj_setattr(self, key, value)
+        if font is not None and key[0] != "_" and key != "visible":
+            font._generation += 1
 
     @property
     def font(self):
@@ -61,5 +84,31 @@ class Master:
     def guidelines(self):
         return MasterGuidelinesList(self)
 
+    @property
+    def kerningVersion(self):
+        return self._kerningVersion
+
+    def _kerningChanged(self):
+        self._kerningVersion += 1
+        font = self._parent
+        if font is not None:
+            font._generation += 1
+
+    def kerningTable(self, vertical=False):
+        """
+        Returns the KerningTable of vKerning if *vertical*, else of hKerning.
+        """
+        return self.vKerning if vertical else self.hKerning
+
+    def removeKerning(self, first, second, vertical=False):
+        self.kerningTable(vertical).removePair(first, second)
+
+    def setKerning(self, first, second, value, vertical=False):
+        """
+        Sets the kerning of a pair, *first* and *second* being glyph names
+        or GROUP_PREFIX-ed group names.
+        """
+        self.kerningTable(vertical).setPair(first, second, value)
+
 
 fontMasterDict = lambda: {"Regular": Master(name="Regular")}
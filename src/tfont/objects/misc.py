@@ -1,6 +1,11 @@
 import attr
 from tfont.util.tracker import obj_setattr
-from typing import Any, Iterable, Optional, Tuple, Union
+from typing import Any, Iterable, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 @attr.s(slots=True)
@@ -72,6 +77,31 @@ class Transformation:
         return x * self.xScale + y * self.yxScale + self.xOffset, \
                y * self.yScale + x * self.xyScale + self.yOffset
 
+    def transformCoordinates(self, coords, mask: Optional[Sequence] = None):
+        """
+        Transforms a flat array("d") of x, y pairs in place, in one go with
+        NumPy if available. If *mask* is given, only pairs whose mask item is
+        true are transformed.
+        """
+        xScale, xyScale, yxScale, yScale, xOffset, yOffset = self
+        if np is not None:
+            xy = np.frombuffer(coords, dtype=float).reshape(-1, 2)
+            matrix = np.array(((xScale, xyScale), (yxScale, yScale)))
+            if mask is None:
+                xy[:] = xy @ matrix + (xOffset, yOffset)
+            else:
+                mask = np.asarray(mask).astype(bool)
+                xy[mask] = xy[mask] @ matrix + (xOffset, yOffset)
+            return
+        if mask is None:
+            indices = range(0, len(coords), 2)
+        else:
+            indices = [2 * i for i, value in enumerate(mask) if value]
+        for index in indices:
+            x, y = coords[index], coords[index+1]
+            coords[index] = x * xScale + y * yxScale + xOffset
+            coords[index+1] = y * yScale + x * xyScale + yOffset
+
     def transformSequence(self, sequence: Iterable,
                           selectionOnly: bool = False) -> bool:
         changed = False
@@ -1,12 +1,20 @@
+from array import array
 import attr
 from copy import copy
 from fontTools.misc import bezierTools
 import pprint
 from tfont.objects.point import Point
 from tfont.util import bezierMath
-from tfont.util.tracker import PathPointsList
+from tfont.util.bounds import pathsBounds
+from tfont.util.coordinates import coordinatesArray, flatCoordinates
+from tfont.util.draw import drawContour, drawPointsContour, pathContour
+from tfont.util.flatten import flattenPath
+from tfont.util.pointArray import SELECTED, PointArray
+from tfont.util.tracker import PathPointsList, bumpLayer, obj_setattr
+from tfont.util.winding import WINDING_TOLERANCE, pathArea, polylineWinding
 from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
+from weakref import ref
 
 
 @attr.s(cmp=False, repr=False, slots=True)
@@ -16,12 +24,20 @@ class Path:
     _extraData: Optional[Dict] = attr.ib(default=None)
 
     _bounds: Optional[Tuple] = attr.ib(default=None, init=False)
+    _boxes: Optional[Tuple] = attr.ib(default=None, init=False)
+    _flattened: Optional[Dict] = attr.ib(default=None, init=False)
     _graphicsPath: Optional[Any] = attr.ib(default=None, init=False)
     _parent: Optional[Any] = attr.ib(default=None, init=False)
+    _segments: Optional[Any] = attr.ib(default=None, init=False)
+    _version: int = attr.ib(default=0, init=False)
 
     def __attrs_post_init__(self):
-        for point in self._points:
-            point._parent = self
+        points = self._points
+        if points.__class__ is list:
+            for point in points:
+                point._parent = self
+        else:
+            points._parent = self
 
     def __bool__(self):
         return bool(self._points)
@@ -30,31 +46,34 @@ class Path:
         name = self.__class__.__name__
         width = 80 - len(name) - 2
         return "%s(%s)" % (
-            name, pprint.pformat(self._points, width=width).replace(
+            name, pprint.pformat(list(self._points), width=width).replace(
                 "\n ", "\n  " + " " * len(name)))  # pad indent
 
     # __setattr__ not needed thus far
 
+    @property
+    def area(self):
+        """
+        The signed area of the path, positive if it runs counter-clockwise.
+        """
+        return pathArea(self)
+
     @property
     def bounds(self):
         bounds = self._bounds
         if bounds is None and self._points:
             # TODO: we could have a rect type, in tools
-            segments = self.segments
-            left, bottom, right, top = segments[0].bounds
-            for segment in segments:
-                l, b, r, t = segment.bounds
-                if l < left:
-                    left = l
-                if b < bottom:
-                    bottom = b
-                if r > right:
-                    right = r
-                if t > top:
-                    top = t
-            bounds = self._bounds = (left, bottom, right, top)
+            bounds, = pathsBounds((self,))
         return bounds
 
+    @property
+    def clockwise(self):
+        return pathArea(self) < 0
+
+    @property
+    def compacted(self):
+        return self._points.__class__ is not list
+
     @property
     def extraData(self):
         extraData = self._extraData
@@ -64,6 +83,14 @@ class Path:
 
     @property
     def graphicsPath(self):
+        layer = self._parent
+        font = layer.font if layer is not None else None
+        if font is not None:
+            # factories are the miss handler of the bounded font cache, see
+            # Layer._graphicsPath()
+            return font.graphicsPathCache.fetch(
+                (id(self), None), self.graphicsPathFactory,
+                (self._version, ref(self)))
         graphicsPath = self._graphicsPath
         if graphicsPath is None:
             graphicsPath = self._graphicsPath = self.graphicsPathFactory()
@@ -104,7 +131,10 @@ class Path:
 
     @property
     def segments(self):
-        return SegmentsList(self.points)
+        segments = self._segments
+        if segments is None:
+            segments = self._segments = SegmentsList(self.points)
+        return segments
 
     @property
     def selected(self):
@@ -115,6 +145,61 @@ class Path:
         for point in self._points:
             point.selected = value
 
+    @property
+    def version(self):
+        return self._version
+
+    def _flatCoordinates(self):
+        points = self._points
+        if points.__class__ is list:
+            coords = array("d")
+            append = coords.append
+            for point in points:
+                append(point.x)
+                append(point.y)
+            return coords
+        return array("d", points._coords)
+
+    def _segmentBoxes(self):
+        # control boxes of self.segments, valid for the current version
+        boxes = self._boxes
+        if boxes is not None and boxes[0] == self._version:
+            return boxes[1]
+        boxes = []
+        for segment in self.segments:
+            coords = segment.coordinates
+            xs, ys = coords[::2], coords[1::2]
+            boxes.append((min(xs), min(ys), max(xs), max(ys)))
+        self._boxes = (self._version, boxes)
+        return boxes
+
+    def _selectionMask(self):
+        points = self._points
+        if points.__class__ is list:
+            return bytearray(point.selected for point in points)
+        return bytearray(flags & SELECTED for flags in points._flags)
+
+    def _setFlatCoordinates(self, coords):
+        self._writeFlatCoordinates(coords)
+        layer = self._parent
+        if layer is not None:
+            layer._selectedPaths = layer._selectionBounds = None
+        # notify
+        self.points.applyChange()
+
+    def _writeFlatCoordinates(self, coords):
+        # no change tracking, the caller notifies
+        points = self._points
+        if len(coords) != 2 * len(points):
+            raise ValueError("expected %d points, got %d" % (
+                len(points), len(coords) // 2))
+        if points.__class__ is list:
+            for point, x, y in zip(points, coords[::2], coords[1::2]):
+                obj_setattr(point, "x", int(x) if x.is_integer() else x)
+                obj_setattr(point, "y", int(y) if y.is_integer() else y)
+        else:
+            points._coords[:] = coords
+
     def close(self):
         points = self._points
         if not (points and self.open):
@@ -125,6 +210,64 @@ class Path:
         points.append(point)
         self.points.applyChange()
 
+    def compact(self):
+        """
+        Moves the points into a PointArray, which stores them in a few dozen
+        bytes each. Path.points then hands out PointProxy objects.
+        """
+        points = self._points
+        if points.__class__ is not list:
+            return
+        storage = PointArray()
+        storage._parent = self
+        storage.extend(points)
+        layer = self._parent
+        for point in points:
+            point._parent = None
+            if layer is not None and point.selected:
+                layer._selection.discard(point)
+        self._points = storage
+        self._segments = None
+        # point objects changed, e.g. for the layer spatial index
+        self._version += 1
+        if layer is not None:
+            bumpLayer(layer)
+
+    def coordinates(self):
+        """
+        Returns the points coordinates as an (N, 2) array of floats (a NumPy
+        array if available, otherwise a memoryview). This is a copy, write it
+        back with setCoordinates().
+        """
+        return coordinatesArray(self._flatCoordinates())
+
+    def draw(self, pen):
+        points, types, _ = pathContour(self)
+        drawContour(pen, points, types)
+
+    def drawPoints(self, pointPen):
+        drawPointsContour(pointPen, *pathContour(self))
+
+    def flatten(self, tolerance=.5):
+        """
+        Returns a polyline approximating the path within *tolerance* units,
+        as a flat array("d") of x, y values; closed paths end where they
+        start. Don't modify it, the last few tolerances are cached.
+        """
+        flattened = self._flattened
+        if flattened is None:
+            flattened = self._flattened = {}
+        else:
+            coords = flattened.pop(tolerance, None)
+            if coords is not None:
+                # most recently used last
+                flattened[tolerance] = coords
+                return coords
+        coords = flattened[tolerance] = flattenPath(self, tolerance)
+        if len(flattened) > 4:
+            del flattened[next(iter(flattened))]
+        return coords
+
     def reverse(self):
         points = self._points
         if not points:
@@ -145,6 +288,13 @@ class Path:
         # notify
         self.points.applyChange()
 
+    def setCoordinates(self, coordinates):
+        """
+        Sets the points coordinates from an (N, 2) array-like, N being the
+        number of points. Notifies once.
+        """
+        self._setFlatCoordinates(flatCoordinates(coordinates))
+
     def startAt(self, index):
         if self.open:
             # implement for endpoints?
@@ -162,12 +312,29 @@ class Path:
     def transform(self, transformation, selectionOnly=False) -> bool:
         if not transformation:
             return
-        changed = transformation.transformSequence(
-            self._points, selectionOnly=selectionOnly)
-        if changed:
-            # notify
-            self.points.applyChange()
-        return changed
+        points = self._points
+        if selectionOnly:
+            mask = self._selectionMask()
+            if not any(mask):
+                return False
+        elif points:
+            mask = None
+        else:
+            return False
+        # transform all coordinates at once, and notify once
+        coords = self._flatCoordinates()
+        transformation.transformCoordinates(coords, mask)
+        self._setFlatCoordinates(coords)
+        return True
+
+    def winding(self, x, y):
+        """
+        Returns the winding number of x, y with respect to the path, out of
+        its cached polyline. Open paths don't enclose anything.
+        """
+        if self.open:
+            return 0
+        return polylineWinding(self.flatten(WINDING_TOLERANCE), x, y)
 
 
 # TODO use abc superclass
@@ -203,6 +370,8 @@ class SegmentsList:
         for seg in segments[index:]:
             seg._start -= size
             seg._end -= size
+        # we're still valid, restore the cache
+        points._parent._segments = self
 
     def __getitem__(self, index):
         return self._segments[index]
@@ -260,6 +429,8 @@ class SegmentsList:
                 seg._end += 3
         else:
             raise ValueError("unattended len %d" % pts_len)
+        # we're still valid, restore the cache
+        self._points._parent._segments = self
         return newSegment
 
 
@@ -276,31 +447,59 @@ class Segment:
 
     @property
     def bounds(self):
-        points = self.points
-        pts_len = len(points)
-        if pts_len == 1:
+        coords = self.coordinates
+        coords_len = len(coords)
+        if coords_len == 2:
             # move
-            p = points[0]
-            x, y = p.x, p.y
+            x, y = coords
             return x, y, x, y
-        elif pts_len == 2:
+        elif coords_len == 4:
             # line
-            p0, p1 = points[0], points[1]
-            left, right = p0.x, p1.x
+            left, bottom, right, top = coords
             if left > right:
                 left, right = right, left
-            bottom, top = p0.y, p1.y
             if bottom > top:
                 bottom, top = top, bottom
             return left, bottom, right, top
-        elif pts_len == 4:
+        elif self.type == "qcurve":
+            left = bottom = float("inf")
+            right = top = float("-inf")
+            for cubic in bezierMath.qcurveCubics(coords):
+                l, b, r, t = bezierMath.curveBoundsXY(*cubic)
+                left, bottom = min(left, l), min(bottom, b)
+                right, top = max(right, r), max(top, t)
+            return left, bottom, right, top
+        elif coords_len == 8:
             # curve
-            return bezierMath.curveBounds(*points)
+            return bezierMath.curveBoundsXY(*coords)
         else:
-            # quads?
             raise NotImplementedError(
                 "cannot compute bounds for %r segment" % self.type)
 
+    @property
+    def coordinates(self):
+        """
+        The x, y coordinates of the segment points, as a flat tuple.
+        """
+        storage = self._points._list
+        end = self._end
+        if storage.__class__ is not list:
+            coords = storage._coords
+            start = self._start
+            if storage._types[end] != 1:  # move
+                start -= 1
+                if start < 0:
+                    return (*coords[-2:], *coords[:2*end+2])
+            return tuple(coords[2*start:2*end+2])
+        point = storage[end]
+        if point.type == "move":
+            return point.x, point.y
+        coords = ()
+        for index in range(self._start - 1, end):
+            p = storage[index]
+            coords += p.x, p.y
+        return coords + (point.x, point.y)
+
     @property
     def offCurves(self):
         return self._points[self._start:self._end]
@@ -329,10 +528,11 @@ class Segment:
 
     @property
     def points(self):
-        start = self._start - (self._points[self._end].type != "move")
+        points = self._points
+        start = self._start - (points[self._end].type != "move")
         if start < 0:  # -:+ slice won't work
-            return self._points[start:] + self._points[:self._end+1]
-        return self._points[start:self._end+1]
+            return [points[index] for index in range(start, self._end+1)]
+        return points[start:self._end+1]
 
     @property
     def selected(self):
@@ -344,16 +544,16 @@ class Segment:
         return self._points[self._end].type
 
     def intersectLine(self, x1, y1, x2, y2):
-        points = self.points
-        pts_len = len(points)
-        if pts_len == 2:
+        coords = self.coordinates
+        coords_len = len(coords)
+        if coords_len == 4:
             # line
-            ret = bezierMath.lineIntersection(x1, y1, x2, y2, *points)
+            ret = bezierMath.lineIntersectionXY(x1, y1, x2, y2, *coords)
             if ret is not None:
                 return [ret]
-        elif pts_len == 4:
+        elif coords_len == 8:
             # curve
-            return bezierMath.curveIntersections(x1, y1, x2, y2, *points)
+            return bezierMath.curveIntersectionsXY(x1, y1, x2, y2, *coords)
         # move, quads
         return []
 
@@ -386,12 +586,12 @@ class Segment:
             points[start].type = "line"
 
     def projectPoint(self, x, y):
-        points = self.points
-        pts_len = len(points)
-        if pts_len == 2:
+        coords = self.coordinates
+        coords_len = len(coords)
+        if coords_len == 4:
             # line
-            return bezierMath.lineProjection(x, y, *points)
-        elif pts_len == 4:
+            return bezierMath.lineProjectionXY(x, y, *coords)
+        elif coords_len == 8:
             # curve
-            return bezierMath.curveProjection(x, y, *points)
+            return bezierMath.curveProjectionXY(x, y, *coords)
         return None
@@ -1,6 +1,5 @@
 import attr
-from tfont.util.tracker import obj_setattr
-from time import time
+from tfont.util.tracker import bumpLayer, obj_setattr
 from typing import Any, Dict, Optional, Union
 from uuid import uuid4
 
@@ -39,22 +38,29 @@ class Point:
                     obj_setattr(self, key, value)
                     layer = path._parent
                     if key == "selected":
+                        if layer is None:
+                            return
                         if value:
                             layer._selection.add(self)
                         else:
                             layer._selection.remove(self)
                         layer._selectedPaths = layer._selectionBounds = None
                     else:
-                        glyph = layer._parent
-                        if key == "x" or key == "y":
+                        path._version += 1
+                        if key == "type":
+                            path._segments = None
+                        if key == "type" or key == "x" or key == "y":
+                            path._bounds = path._flattened = \
+                                path._graphicsPath = None
+                            if layer is None:
+                                return
                             if self.selected:
                                 layer._selectedPaths = \
                                     layer._selectionBounds = None
-                            path._bounds = path._graphicsPath = \
-                                layer._bounds = \
-                                layer._closedGraphicsPath = \
-                                layer._openGraphicsPath = None
-                        glyph._lastModified = time()
+                            layer._bounds = None
+                        if layer is None:
+                            return
+                        bumpLayer(layer)
                 return
         obj_setattr(self, key, value)
 
@@ -1,13 +1,23 @@
 from fontTools.misc import bezierTools
 import math
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # TODO remove fontTools dependency/inline some of these funcs
 
+# The *XY variants take raw coordinates, e.g. from Segment.coordinates, so
+# that per-segment math needn't build point containers.
+
 
 def curveBounds(p0, p1, p2, p3):
-    x0, x1, x2, x3 = p0.x, p1.x, p2.x, p3.x
-    y0, y1, y2, y3 = p0.y, p1.y, p2.y, p3.y
-    ts, xs, ys = [], [x0, x3], [y0, y3]
+    return curveBoundsXY(p0.x, p0.y, p1.x, p1.y, p2.x, p2.y, p3.x, p3.y)
+
+
+def curveBoundsXY(x0, y0, x1, y1, x2, y2, x3, y3):
+    ts = []
 
     for i in range(2):
         if i == 0:
@@ -38,22 +48,76 @@ def curveBounds(p0, p1, p2, p3):
         if 0 < t2 < 1:
             ts.append(t2)
 
-    for j in range(len(ts) - 1, -1, -1):
-        t = ts[j]
+    # the extrema are added to, not swapped for the endpoints
+    xs, ys = [x0, x3], [y0, y3]
+    for t in ts:
         mt = 1 - t
-        xValue = mt * mt * mt * x0 + 3 * mt * mt * t * x1 + 3 * mt * t * t * x2 + t * t * t * x3
-        if len(xs) > 0:
-            xs[j] = xValue
-        else:
-            xs.append(xValue)
-        yValue = mt * mt * mt * y0 + 3 * mt * mt * t * y1 + 3 * mt * t * t * y2 + t * t * t * y3
-        if len(ys) > 0:
-            ys[j] = yValue
-        else:
-            ys.append(yValue)
+        xs.append(mt * mt * mt * x0 + 3 * mt * mt * t * x1 +
+                  3 * mt * t * t * x2 + t * t * t * x3)
+        ys.append(mt * mt * mt * y0 + 3 * mt * mt * t * y1 +
+                  3 * mt * t * t * y2 + t * t * t * y3)
 
     return min(xs), min(ys), max(xs), max(ys)
 
+
+def curvesBounds(coords):
+    """
+    Computes the bounds of many cubic curves at once. *coords* is a flat
+    buffer of doubles with the 8 coordinates of each curve; returns a
+    sequence of (left, bottom, right, top) per curve.
+
+    Extrema roots are solved in a vectorized way if NumPy is installed.
+    """
+    if np is None or len(coords) < 64:
+        return [curveBoundsXY(*coords[i:i+8])
+                for i in range(0, len(coords), 8)]
+    p = np.frombuffer(coords, dtype=float).reshape(-1, 4, 2)
+    p0, p1, p2, p3 = p[:, 0], p[:, 1], p[:, 2], p[:, 3]
+    # derivative coefficients, per axis
+    a = -3 * p0 + 9 * p1 - 9 * p2 + 3 * p3
+    b = 6 * p0 - 12 * p1 + 6 * p2
+    c = 3 * p1 - 3 * p0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sqrtb2ac = np.sqrt(b * b - 4 * c * a)
+        t1 = (-b + sqrtb2ac) / (2 * a)
+        t2 = (-b - sqrtb2ac) / (2 * a)
+        linear = np.abs(a) < 1e-12
+        t1 = np.where(linear, -c / b, t1)
+        t2 = np.where(linear, np.nan, t2)
+    ts = np.stack((t1, t2), axis=1)
+    # roots out of range (or nan) fall back to t = 0, i.e. the start point
+    ts[~((ts > 0) & (ts < 1))] = 0
+    mt = 1 - ts
+    values = (mt * mt * mt * p0[:, None] + 3 * mt * mt * ts * p1[:, None] +
+              3 * mt * ts * ts * p2[:, None] + ts * ts * ts * p3[:, None])
+    bounds = np.empty((len(p), 4))
+    bounds[:, :2] = np.minimum(np.minimum(p0, p3), values.min(axis=1))
+    bounds[:, 2:] = np.maximum(np.maximum(p0, p3), values.max(axis=1))
+    return bounds.tolist()
+
+
+def qcurveCubics(coords):
+    """
+    Returns the quadratic pieces of a qcurve segment, given by its flat x, y
+    coordinates, as equivalent cubic curves of 8 coordinates each. The
+    on-curve points implied between consecutive off-curves are made
+    explicit, as in fontTools' decomposeQuadraticSegment().
+    """
+    cubics = []
+    x0, y0 = coords[0], coords[1]
+    last = len(coords) - 2
+    for i in range(2, last, 2):
+        qx, qy = coords[i], coords[i+1]
+        if i + 2 < last:
+            x3, y3 = .5 * (qx + coords[i+2]), .5 * (qy + coords[i+3])
+        else:
+            x3, y3 = coords[last], coords[last+1]
+        cubics.append((
+            x0, y0, x0 + 2 / 3 * (qx - x0), y0 + 2 / 3 * (qy - y0),
+            x3 + 2 / 3 * (qx - x3), y3 + 2 / 3 * (qy - y3), x3, y3))
+        x0, y0 = x3, y3
+    return cubics
+
 # ------------
 # Intersection
 # ------------
@@ -67,23 +131,30 @@ def curveIntersections(x1, y1, x2, y2, p1, p2, p3, p4):
     Takes four scalars describing line parameters and four points describing
     curve.
     """
+    return curveIntersectionsXY(
+        x1, y1, x2, y2, p1.x, p1.y, p2.x, p2.y, p3.x, p3.y, p4.x, p4.y)
+
+
+def curveIntersectionsXY(x1, y1, x2, y2, x3, y3, x4, y4, x5, y5, x6, y6):
     bx, by = x1 - x2, y2 - y1
     m = x1 * (y1 - y2) + y1 * (x2 - x1)
-    a, b, c, d = bezierTools.calcCubicParameters(
-        (p1.x, p1.y), (p2.x, p2.y), (p3.x, p3.y), (p4.x, p4.y))
+    # inline bezierTools.calcCubicParameters
+    cx, cy = 3 * (x4 - x3), 3 * (y4 - y3)
+    bbx, bby = 3 * (x5 - x4) - cx, 3 * (y5 - y4) - cy
+    ax, ay = x6 - x3 - cx - bbx, y6 - y3 - cy - bby
 
-    pc0 = by * a[0] + bx * a[1]
-    pc1 = by * b[0] + bx * b[1]
-    pc2 = by * c[0] + bx * c[1]
-    pc3 = by * d[0] + bx * d[1] + m
+    pc0 = by * ax + bx * ay
+    pc1 = by * bbx + bx * bby
+    pc2 = by * cx + bx * cy
+    pc3 = by * x3 + bx * y3 + m
     r = bezierTools.solveCubic(pc0, pc1, pc2, pc3)
 
     sol = []
     for t in r:
         if t < 0 or t > 1:
             continue
-        s0 = ((a[0] * t + b[0]) * t + c[0]) * t + d[0]
-        s1 = ((a[1] * t + b[1]) * t + c[1]) * t + d[1]
+        s0 = ((ax * t + bbx) * t + cx) * t + x3
+        s1 = ((ay * t + bby) * t + cy) * t + y3
         if (x2 - x1) != 0:
             s = (s0 - x1) / (x2 - x1)
         else:
@@ -103,9 +174,10 @@ def lineIntersection(x1, y1, x2, y2, p3, p4):
     Takes four scalars describing line parameters and two points describing
     line.
     """
-    x3, y3 = p3.x, p3.y
-    x4, y4 = p4.x, p4.y
+    return lineIntersectionXY(x1, y1, x2, y2, p3.x, p3.y, p4.x, p4.y)
 
+
+def lineIntersectionXY(x1, y1, x2, y2, x3, y3, x4, y4):
     Bx_Ax = x4 - x3
     By_Ay = y4 - y3
     Dx_Cx = x2 - x1
@@ -119,48 +191,156 @@ def lineIntersection(x1, y1, x2, y2, p3, p4):
         return x3 + (t * Bx_Ax), y3 + (t * By_Ay), t
     return None
 
+
+def lineIntersectsRect(x1, y1, x2, y2, left, bottom, right, top):
+    """
+    Returns whether line x1 y1 x2 y2 may cross the rect, as a cheap
+    rejection test before solving for intersections.
+    """
+    if x1 < x2:
+        if x2 < left or x1 > right:
+            return False
+    elif x1 < left or x2 > right:
+        return False
+    if y1 < y2:
+        if y2 < bottom or y1 > top:
+            return False
+    elif y1 < bottom or y2 > top:
+        return False
+    # the rect corners are all on one side of the line
+    dx, dy = x2 - x1, y2 - y1
+    l, r = -dy * (left - x1), -dy * (right - x1)
+    b, t = dx * (bottom - y1), dx * (top - y1)
+    c1, c2, c3, c4 = l + b, r + b, r + t, l + t
+    if c1 > 0 and c2 > 0 and c3 > 0 and c4 > 0:
+        return False
+    if c1 < 0 and c2 < 0 and c3 < 0 and c4 < 0:
+        return False
+    return True
+
 # ----------
 # Projection
 # ----------
 
+_PROJECTION_STEPS = 16
+_PROJECTION_ITERATIONS = 8
+_PROJECTION_MINIMA = 3
+
 
 def curveProjection(x, y, p0, p1, p2, p3):
     """
-    Returns projection of point x, y on line p0 p1 p2 p3.
-    Adapted from PaperJS getNearestTime().
+    Returns projection of point x, y on curve p0 p1 p2 p3.
+
+    The curve is sampled coarsely, then the nearest sample is refined with
+    Newton iterations on the derivative of the squared distance.
     """
-    x0, x1, x2, x3 = p0.x, p1.x, p2.x, p3.x
-    y0, y1, y2, y3 = p0.y, p1.y, p2.y, p3.y
-    steps = 100
+    return curveProjectionXY(
+        x, y, p0.x, p0.y, p1.x, p1.y, p2.x, p2.y, p3.x, p3.y)
+
+
+def curveProjectionXY(x, y, x0, y0, x1, y1, x2, y2, x3, y3):
+    # polynomial coefficients
+    cx, cy = 3 * (x1 - x0), 3 * (y1 - y0)
+    bx, by = 3 * (x2 - x1) - cx, 3 * (y2 - y1) - cy
+    ax, ay = x3 - x0 - cx - bx, y3 - y0 - cy - by
+    dx, dy = x0 - x, y0 - y
+    # coarse sample
+    sqDists = []
+    for i in range(_PROJECTION_STEPS + 1):
+        t = i / _PROJECTION_STEPS
+        qx = ((ax * t + bx) * t + cx) * t + dx
+        qy = ((ay * t + by) * t + cy) * t + dy
+        sqDists.append(qx * qx + qy * qy)
     minSqDist = None
-    minX, minY, minT = 0, 0, 0
-
-    def refineProjection(t):
-        if t >= 0 and t <= 1:
-            nonlocal minSqDist, minX, minY, minT
-            mt = 1 - t
-            xValue = mt * mt * mt * x0 + 3 * mt * mt * t * x1 + 3 * mt * t * t * x2 + t * t * t * x3
-            yValue = mt * mt * mt * y0 + 3 * mt * mt * t * y1 + 3 * mt * t * t * y2 + t * t * t * y3
-            dx = xValue - x
-            dy = yValue - y
-            sqDist = dx * dx + dy * dy
-            if minSqDist is None or sqDist < minSqDist:
-                minSqDist = sqDist
-                minX = xValue
-                minY = yValue
-                minT = t
-                return True
-        return False
+    last = _PROJECTION_STEPS
+    for i, sqDist in enumerate(sqDists):
+        # refine each local minimum
+        if i and sqDists[i-1] < sqDist or i < last and sqDists[i+1] < sqDist:
+            continue
+        # Newton iterations on the derivative of the squared distance
+        t = i / last
+        for _ in range(_PROJECTION_ITERATIONS):
+            qx = ((ax * t + bx) * t + cx) * t + dx
+            qy = ((ay * t + by) * t + cy) * t + dy
+            d1x = (3 * ax * t + 2 * bx) * t + cx
+            d1y = (3 * ay * t + 2 * by) * t + cy
+            d2x = 6 * ax * t + 2 * bx
+            d2y = 6 * ay * t + 2 * by
+            denominator = d1x * d1x + d1y * d1y + qx * d2x + qy * d2y
+            if not denominator:
+                break
+            step = (qx * d1x + qy * d1y) / denominator
+            t = min(max(t - step, 0.), 1.)
+            if abs(step) < 1e-9:
+                break
+        qx = ((ax * t + bx) * t + cx) * t + dx
+        qy = ((ay * t + by) * t + cy) * t + dy
+        refinedSqDist = qx * qx + qy * qy
+        if refinedSqDist > sqDist:
+            # diverged, keep the sample
+            t = i / last
+            refinedSqDist = sqDist
+        if minSqDist is None or refinedSqDist < minSqDist:
+            minSqDist, minT = refinedSqDist, t
+    t = minT
+    return (((ax * t + bx) * t + cx) * t + x0,
+            ((ay * t + by) * t + cy) * t + y0, t)
 
-    for i in range(steps+1):
-        t = i / steps
-        refineProjection(t)
 
-    step = 1 / (2 * steps)
-    while step > 1e-8:
-        if not refineProjection(minT - step) and not refineProjection(minT + step):
-            step = .5 * step
-    return minX, minY, minT
+def curvesProjection(x, y, coords):
+    """
+    Projects point x, y on many cubic curves at once. *coords* is a flat
+    buffer of doubles with the 8 coordinates of each curve; returns a
+    sequence of (x, y, t, squared distance) per curve.
+    """
+    if np is None or len(coords) < 64:
+        result = []
+        for i in range(0, len(coords), 8):
+            px, py, t = curveProjectionXY(x, y, *coords[i:i+8])
+            dx, dy = px - x, py - y
+            result.append((px, py, t, dx * dx + dy * dy))
+        return result
+    p = np.frombuffer(coords, dtype=float).reshape(-1, 4, 2)
+    # (curves, samples, axes) shaped coefficients
+    d = (p[:, 0] - (x, y))[:, None]
+    c = 3 * (p[:, 1] - p[:, 0])[:, None]
+    b = 3 * (p[:, 2] - p[:, 1])[:, None] - c
+    a = (p[:, 3] - p[:, 0])[:, None] - c - b
+    # coarse sample
+    samples = np.linspace(0, 1, _PROJECTION_STEPS + 1)[None, :, None]
+    q = ((a * samples + b) * samples + c) * samples + d
+    sqDists = (q * q).sum(axis=2)
+    # refine the nearest local minima
+    padded = np.pad(sqDists, ((0, 0), (1, 1)), constant_values=np.inf)
+    minima = (sqDists <= padded[:, :-2]) & (sqDists <= padded[:, 2:])
+    candidates = np.argsort(
+        np.where(minima, sqDists, np.inf), axis=1)[:, :_PROJECTION_MINIMA]
+    rows = np.arange(len(p))[:, None]
+    sampleSqDists = sqDists[rows, candidates]
+    sampleT = t = samples[0, candidates]
+    # Newton iterations on the derivative of the squared distance
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for _ in range(_PROJECTION_ITERATIONS):
+            q = ((a * t + b) * t + c) * t + d
+            d1 = (3 * a * t + 2 * b) * t + c
+            d2 = 6 * a * t + 2 * b
+            step = (q * d1).sum(axis=2, keepdims=True) / \
+                (d1 * d1 + q * d2).sum(axis=2, keepdims=True)
+            t = np.clip(t - np.nan_to_num(step), 0, 1)
+    q = ((a * t + b) * t + c) * t + d
+    refinedSqDists = (q * q).sum(axis=2)
+    # diverged, keep the sample
+    diverged = refinedSqDists > sampleSqDists
+    t = np.where(diverged[..., None], sampleT, t)
+    q = ((a * t + b) * t + c) * t + d
+    refinedSqDists = (q * q).sum(axis=2)
+    nearest = refinedSqDists.argmin(axis=1)
+    rows = rows[:, 0]
+    result = np.empty((len(p), 4))
+    result[:, :2] = q[rows, nearest] + (x, y)
+    result[:, 2] = t[rows, nearest, 0]
+    result[:, 3] = refinedSqDists[rows, nearest]
+    return result.tolist()
 
 
 def lineProjection(x, y, p1, p2, ditchOutOfSegment=True):
@@ -173,19 +353,53 @@ def lineProjection(x, y, p1, p2, ditchOutOfSegment=True):
     to p1 p2 that intersects both p and a point of p1 p2.
     This is useful for certain GUI usages. Set by default.
     """
-    bX = p2.x - p1.x
-    bY = p2.y - p1.y
+    return lineProjectionXY(x, y, p1.x, p1.y, p2.x, p2.y, ditchOutOfSegment)
+
+
+def lineProjectionXY(x, y, x1, y1, x2, y2, ditchOutOfSegment=True):
+    bX = x2 - x1
+    bY = y2 - y1
     l2 = bX * bX + bY * bY
     if not l2:
-        return p1.x, p1.y, 0.0
-    aX = x - p1.x
-    aY = y - p1.y
+        return x1, y1, 0.0
+    aX = x - x1
+    aY = y - y1
     t = (aX * bX + aY * bY) / l2
     if ditchOutOfSegment:
         if t < 0:
-            return p1.x, p1.y, t
+            return x1, y1, t
         elif t > 1:
-            return p2.x, p2.y, t
-    projX = p1.x + t * bX
-    projY = p1.y + t * bY
+            return x2, y2, t
+    projX = x1 + t * bX
+    projY = y1 + t * bY
     return projX, projY, t
+
+
+def linesProjection(x, y, coords):
+    """
+    Projects point x, y on many lines at once. *coords* is a flat buffer of
+    doubles with the 4 coordinates of each line; returns a sequence of
+    (x, y, t, squared distance) per line, with t clamped to the segment.
+    """
+    if np is None or len(coords) < 32:
+        result = []
+        for i in range(0, len(coords), 4):
+            x1, y1, x2, y2 = coords[i:i+4]
+            px, py, t = lineProjectionXY(x, y, x1, y1, x2, y2)
+            t = min(max(t, 0.), 1.)
+            dx, dy = px - x, py - y
+            result.append((px, py, t, dx * dx + dy * dy))
+        return result
+    p = np.frombuffer(coords, dtype=float).reshape(-1, 2, 2)
+    p1 = p[:, 0]
+    v = p[:, 1] - p1
+    l2 = (v * v).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = ((p1 - (x, y)) * -v).sum(axis=1) / l2
+    t = np.clip(np.nan_to_num(t), 0, 1)
+    result = np.empty((len(p), 4))
+    result[:, :2] = p1 + t[:, None] * v
+    result[:, 2] = t
+    q = result[:, :2] - (x, y)
+    result[:, 3] = (q * q).sum(axis=1)
+    return result.tolist()
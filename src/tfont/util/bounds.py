@@ -0,0 +1,74 @@
+from array import array
+from tfont.util.bezierMath import curvesBounds, qcurveCubics
+
+
+def layersBounds(layers):
+    """
+    Returns the bounds of each layer, computing the path bounds that aren't
+    cached in a single batch across all layers.
+    """
+    layers = list(layers)
+    pathsBounds([
+        path for layer in layers if layer._bounds is None
+        for path in layer._paths])
+    return [layer.bounds for layer in layers]
+
+
+def pathsBounds(paths):
+    """
+    Returns the bounds of each path (None if it is empty). Those that aren't
+    cached are computed and stashed, with the extrema of all their curve
+    segments solved in one batch, quadratics elevated to cubics.
+    """
+    curves = array("d")
+    owners = []
+    pending = {}
+    for index, path in enumerate(paths):
+        if path._bounds is not None or not path._points:
+            continue
+        left = bottom = float("inf")
+        right = top = float("-inf")
+        for segment in path.segments:
+            coords = segment.coordinates
+            coords_len = len(coords)
+            if coords_len > 4:
+                type_ = segment.type
+                if type_ == "curve" and coords_len == 8:
+                    # curve, endpoints are covered by its bounds
+                    curves.extend(coords)
+                    owners.append(index)
+                    continue
+                elif type_ == "qcurve":
+                    for cubic in qcurveCubics(coords):
+                        curves.extend(cubic)
+                        owners.append(index)
+                    continue
+                elif type_ != "line":
+                    raise NotImplementedError(
+                        "cannot compute bounds for %r segment" % type_)
+            # move, line (off-curves before a line point are ignored): the
+            # start point belongs to the previous segment
+            x, y = coords[-2], coords[-1]
+            if x < left:
+                left = x
+            if y < bottom:
+                bottom = y
+            if x > right:
+                right = x
+            if y > top:
+                top = y
+        pending[index] = [left, bottom, right, top]
+    if curves:
+        for index, (l, b, r, t) in zip(owners, curvesBounds(curves)):
+            bounds = pending[index]
+            if l < bounds[0]:
+                bounds[0] = l
+            if b < bounds[1]:
+                bounds[1] = b
+            if r > bounds[2]:
+                bounds[2] = r
+            if t > bounds[3]:
+                bounds[3] = t
+    for index, bounds in pending.items():
+        paths[index]._bounds = tuple(bounds)
+    return [path._bounds for path in paths]
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache:
+    """
+    A mapping that keeps its most recently used entries within a budget of
+    *maxsize*, evicting the least recently used ones beyond it. Entries
+    weigh getsize(value), 1 by default, so that maxsize can be an entry
+    count or e.g. a memory budget. None means unbounded.
+
+    The hits, misses and evictions counters help sizing the cache.
+
+    The cache can be shared between threads. Factories run unlocked, so
+    threads that miss the same key concurrently may each compute it.
+    """
+
+    __slots__ = ("_data", "_lock", "currsize", "evictions", "getsize",
+                 "hits", "maxsize", "misses")
+
+    def __init__(self, maxsize=None, getsize=None):
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.currsize = 0
+        self.evictions = self.hits = self.misses = 0
+        self.getsize = getsize
+        self.maxsize = maxsize
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return "%s(%d entries, %r/%r, %d hits, %d misses, %d evictions)" % (
+            self.__class__.__name__, len(self._data), self.currsize,
+            self.maxsize, self.hits, self.misses, self.evictions)
+
+    def _evict(self):
+        maxsize = self.maxsize
+        if maxsize is None:
+            return
+        data = self._data
+        while self.currsize > maxsize and data:
+            _, (_, _, size) = data.popitem(last=False)
+            self.currsize -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.currsize = 0
+
+    def fetch(self, key, factory, version=None):
+        """
+        Returns the value cached for key if it was stored with the same
+        *version*, otherwise calls factory() and caches its result.
+        """
+        data = self._data
+        with self._lock:
+            entry = data.get(key)
+            if entry is not None:
+                if entry[0] == version:
+                    data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del data[key]
+                self.currsize -= entry[2]
+            self.misses += 1
+        value = factory()
+        getsize = self.getsize
+        size = 1 if getsize is None else getsize(value)
+        with self._lock:
+            entry = data.pop(key, None)
+            if entry is not None:
+                self.currsize -= entry[2]
+            data[key] = (version, value, size)
+            self.currsize += size
+            self._evict()
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return default
+            self.currsize -= entry[2]
+        return entry[1]
+
+    def resetStats(self):
+        self.evictions = self.hits = self.misses = 0
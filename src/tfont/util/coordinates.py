@@ -0,0 +1,42 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def coordinatesArray(coords):
+    """
+    Wraps a flat array("d") of x, y pairs as an (N, 2) array of floats, without
+    copying: a NumPy array if it is installed, otherwise a 2-dimensional
+    memoryview (a 1-dimensional, empty one for N == 0).
+    """
+    if np is not None:
+        return np.frombuffer(coords, dtype=float).reshape(-1, 2)
+    view = memoryview(coords)
+    if not coords:
+        return view
+    return view.cast("B").cast("d", (len(coords) // 2, 2))
+
+
+def flatCoordinates(value):
+    """
+    Returns the content of an (N, 2) array-like (NumPy array, buffer of
+    doubles, or sequence of x, y pairs) as a flat array("d").
+    """
+    if np is not None and value.__class__ is not array:
+        value = np.ascontiguousarray(value, dtype=float)
+    try:
+        view = memoryview(value)
+    except TypeError:
+        view = None
+    coords = array("d")
+    if view is not None and view.format == "d" and view.c_contiguous:
+        coords.frombytes(view.cast("B"))
+    else:
+        append = coords.append
+        for x, y in value:
+            append(x)
+            append(y)
+    return coords
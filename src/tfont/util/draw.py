@@ -0,0 +1,104 @@
+from tfont.util.pointArray import SMOOTH, _typeCode, _types
+
+# point type codes, see PointArray
+_MOVE = 1
+_CURVE = 3
+_QCURVE = 4
+
+
+def drawContour(pen, points, types):
+    """
+    Draws a contour, given as a list of x, y points and a sequence of their
+    type codes, into a segment pen the way fontTools' PointToSegmentPen
+    would. Closed contours start at their first on-curve point.
+    """
+    count = len(types)
+    if not count:
+        return
+    offCurves = []
+    if types[0] == _MOVE:
+        lastPt = points[0]
+        pen.moveTo(lastPt)
+        for index in range(1, count):
+            code = types[index]
+            if not code:
+                offCurves.append(points[index])
+                continue
+            pt = points[index]
+            if code == _CURVE:
+                pen.curveTo(*offCurves, pt)
+            elif code == _QCURVE:
+                pen.qCurveTo(*offCurves, pt)
+            else:
+                pen.lineTo(pt)
+            offCurves = []
+        pen.endPath()
+        return
+    first = 0
+    while first < count and not types[first]:
+        first += 1
+    if first == count:
+        # quadratic contour without on-curve points
+        pen.qCurveTo(*points, None)
+        pen.closePath()
+        return
+    lastPt = points[first]
+    pen.moveTo(lastPt)
+    for index in range(first + 1, first + count + 1):
+        if index >= count:
+            index -= count
+        code = types[index]
+        if not code:
+            offCurves.append(points[index])
+            continue
+        pt = points[index]
+        if code == _CURVE:
+            pen.curveTo(*offCurves, pt)
+        elif code == _QCURVE:
+            pen.qCurveTo(*offCurves, pt)
+        # the closing line is implied, unless it has zero length
+        elif index != first or pt == lastPt:
+            pen.lineTo(pt)
+        offCurves = []
+        lastPt = pt
+    pen.closePath()
+
+
+def drawPointsContour(pointPen, points, types, smooth):
+    """
+    Draws a contour, given as in drawContour() along with a sequence of
+    smooth flags, into a point pen.
+    """
+    pointPen.beginPath()
+    addPoint = pointPen.addPoint
+    for pt, code, isSmooth in zip(points, types, smooth):
+        addPoint(pt, _types[code], bool(isSmooth))
+    pointPen.endPath()
+
+
+def pathContour(path):
+    """
+    Returns the (points, types, smooth) contour of a path, read straight from
+    its storage.
+    """
+    points = path._points
+    if points.__class__ is list:
+        return (
+            [(point.x, point.y) for point in points],
+            [_typeCode(point.type) for point in points],
+            [point.smooth for point in points])
+    coords = points._coords
+    return (
+        list(zip(coords[::2], coords[1::2])), points._types,
+        [flags & SMOOTH for flags in points._flags])
+
+
+def pointContours(contours):
+    """
+    Returns (points, types, smooth) contours, as drawContour() takes them,
+    from (coords, types, smooth) contours as given by
+    outline.componentContours().
+    """
+    return [
+        (list(zip(coords[::2], coords[1::2])), types, smooth)
+        for coords, types, smooth in contours]
@@ -0,0 +1,122 @@
+from concurrent.futures import Future
+from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+from fontTools.ttLib import TTFont
+from hashlib import sha1
+from threading import Thread
+
+# the tables compiled from feature code
+FEATURE_TABLES = ("BASE", "GDEF", "GPOS", "GSUB")
+
+
+def _cacheKey(text, glyphOrder):
+    digest = sha1(text.encode("utf-8"))
+    digest.update("\0".join(glyphOrder).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _compile(text, glyphOrder):
+    ttFont = TTFont()
+    ttFont.setGlyphOrder(list(glyphOrder))
+    if text.strip():
+        addOpenTypeFeaturesFromString(
+            ttFont, text, tables=frozenset(FEATURE_TABLES))
+    return {tag: ttFont[tag] for tag in FEATURE_TABLES if tag in ttFont}
+
+
+def compileFeatures(text, glyphOrder, cache=None):
+    """
+    Compiles feature code for the given glyph order with feaLib, and returns
+    a dict of the resulting fontTools tables by tag (see FEATURE_TABLES).
+
+    If given an LRUCache, such as Font.featureCache, results are cached
+    there by a hash of the text and glyph order, and shared: do not modify
+    them.
+    """
+    if cache is None:
+        return _compile(text, glyphOrder)
+    return cache.fetch(
+        _cacheKey(text, glyphOrder), lambda: _compile(text, glyphOrder))
+
+
+def fontGlyphOrder(font):
+    """
+    Returns the glyph order of the binary fonts compiled from *font*: its
+    glyph names, with .notdef first (added if missing). Features are compiled
+    against it, so that builds and the layout engine share cached tables.
+    """
+    glyphOrder = [glyph.name for glyph in font._glyphs]
+    if not glyphOrder or glyphOrder[0] != ".notdef":
+        if ".notdef" in glyphOrder:
+            glyphOrder.remove(".notdef")
+        glyphOrder.insert(0, ".notdef")
+    return glyphOrder
+
+
+def compileFeaturesAsync(text, glyphOrder, cache=None):
+    """
+    Returns a Future for compileFeatures(), compiled on a thread of its own
+    that ends with it. The Future is already done if the result was cached.
+    """
+    future = Future()
+    if cache is not None and _cacheKey(text, glyphOrder) in cache:
+        future.set_result(compileFeatures(text, glyphOrder, cache))
+        return future
+
+    def run():
+        try:
+            result = compileFeatures(text, glyphOrder, cache)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    Thread(target=run, daemon=True).start()
+    return future
+
+
+class LayoutEngine:
+    """
+    The compiled layout tables of a font: its feature text compiled for its
+    glyph order (see fontGlyphOrder()), cached in the font featureCache.
+    With *background*, compilation runs on a background thread; tables then
+    waits for it, ready tells whether it is done.
+
+    This is what Font.layoutEngineFactory() makes by default, without
+    background compilation. Hosts can opt into it with e.g.:
+
+        Font.layoutEngineFactory = lambda font: LayoutEngine(font, True)
+    """
+
+    __slots__ = ("_future", "glyphOrder", "text")
+
+    def __init__(self, font, background=False):
+        self.glyphOrder = glyphOrder = fontGlyphOrder(font)
+        self.text = text = font.featureText
+        cache = font.featureCache
+        if background:
+            self._future = compileFeaturesAsync(text, glyphOrder, cache)
+        else:
+            self._future = future = Future()
+            try:
+                future.set_result(compileFeatures(text, glyphOrder, cache))
+            except Exception as e:
+                future.set_exception(e)
+
+    @property
+    def error(self):
+        """
+        The exception raised by feaLib, if compilation failed. Waits for it.
+        """
+        return self._future.exception()
+
+    @property
+    def ready(self):
+        return self._future.done()
+
+    @property
+    def tables(self):
+        """
+        The compiled tables by tag, see compileFeatures(). Waits for
+        compilation, and raises its error if it failed.
+        """
+        return self._future.result()
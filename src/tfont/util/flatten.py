@@ -0,0 +1,68 @@
+from array import array
+from math import ceil, sqrt
+from tfont.util.bezierMath import qcurveCubics
+
+
+def _flattenCurve(x0, y0, x1, y1, x2, y2, x3, y3, tolerance, coords):
+    # uniformly subdivided. the distance to the chords is bounded by
+    # max|B''| / (8 n^2), and max|B''| by 6 times the largest second
+    # difference of the control points
+    ddx1, ddy1 = x0 - 2 * x1 + x2, y0 - 2 * y1 + y2
+    ddx2, ddy2 = x1 - 2 * x2 + x3, y1 - 2 * y2 + y3
+    dd = sqrt(max(ddx1 * ddx1 + ddy1 * ddy1, ddx2 * ddx2 + ddy2 * ddy2))
+    steps = max(1, ceil(sqrt(.75 * dd / tolerance)))
+    cx, cy = 3 * (x1 - x0), 3 * (y1 - y0)
+    bx, by = 3 * (x2 - x1) - cx, 3 * (y2 - y1) - cy
+    ax, ay = x3 - x0 - cx - bx, y3 - y0 - cy - by
+    append = coords.append
+    for i in range(1, steps):
+        t = i / steps
+        append(((ax * t + bx) * t + cx) * t + x0)
+        append(((ay * t + by) * t + cy) * t + y0)
+    append(x3)
+    append(y3)
+
+
+def flattenPath(path, tolerance):
+    """
+    Approximates a path with a polyline that strays at most *tolerance* units
+    from its curves, and returns it as a flat array("d") of x, y values.
+    Closed paths start and end at their last point.
+    """
+    coords = array("d")
+    segments = path.segments
+    if not segments:
+        return coords
+    coords.extend(segments[0].coordinates[:2])
+    for segment in segments:
+        flattenSegment(segment, tolerance, coords)
+    return coords
+
+
+def flattenSegment(segment, tolerance, coords):
+    """
+    Appends to *coords* the x, y values of a polyline that strays at most
+    *tolerance* units from *segment*, omitting its start point.
+    """
+    segmentCoords = segment.coordinates
+    segmentCoords_len = len(segmentCoords)
+    if segmentCoords_len == 4:
+        # line
+        coords.extend(segmentCoords[2:])
+    elif segmentCoords_len == 2:
+        # move
+        return
+    else:
+        type_ = segment.type
+        if type_ == "curve" and segmentCoords_len == 8:
+            _flattenCurve(*segmentCoords, tolerance, coords)
+        elif type_ == "qcurve":
+            # quadratics are flattened as the cubics they elevate to
+            for cubic in qcurveCubics(segmentCoords):
+                _flattenCurve(*cubic, tolerance, coords)
+        elif type_ == "line":
+            # off-curves before a line point are ignored
+            coords.extend(segmentCoords[-2:])
+        else:
+            raise NotImplementedError(
+                "cannot flatten %r segment" % type_)
@@ -0,0 +1,237 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+
+# kerning keys of this form refer to a kerning group
+GROUP_PREFIX = "@"
+
+
+class KerningTable(MutableMapping):
+    """
+    Compact kerning storage: names are interned as integer ids and pairs
+    are stored as a sorted array of 64-bit keys along an array of values,
+    about 16 bytes per pair. Pair lookups are binary searches.
+
+    This is what Master.hKerning and vKerning hold. It reads and writes as a
+    {first: {second: value}} dict, rows being views into the table (see
+    getPair() and setPair() for direct pair access), and tells its master
+    when it changes, however it is edited.
+    """
+
+    __slots__ = ("_ids", "_keys", "_names", "_parent", "_values")
+
+    def __init__(self, kerning=None):
+        self._ids = {}
+        self._names = []
+        self._parent = None
+        pairs = []
+        if kerning:
+            id_ = self._id
+            for first, seconds in kerning.items():
+                firstId = id_(first) << 32
+                for second, value in seconds.items():
+                    pairs.append((firstId | id_(second), value))
+            pairs.sort()
+        self._keys = array("q", [key for key, _ in pairs])
+        self._values = array("d", [value for _, value in pairs])
+
+    def __bool__(self):
+        return bool(self._keys)
+
+    def __delitem__(self, first):
+        start, stop = self._range(first)
+        if start == stop:
+            raise KeyError(first)
+        del self._keys[start:stop]
+        del self._values[start:stop]
+        self._changed()
+
+    def __getitem__(self, first):
+        start, stop = self._range(first)
+        if start == stop:
+            raise KeyError(first)
+        return KerningRow(self, first)
+
+    def __iter__(self):
+        names = self._names
+        lastId = None
+        for key in self._keys[:]:
+            firstId = key >> 32
+            if firstId != lastId:
+                lastId = firstId
+                yield names[firstId]
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return "%s(%d pairs)" % (self.__class__.__name__, len(self._keys))
+
+    def __setitem__(self, first, seconds):
+        seconds = dict(seconds.items())
+        start, stop = self._range(first)
+        del self._keys[start:stop]
+        del self._values[start:stop]
+        for second, value in seconds.items():
+            self._set(first, second, value)
+        self._changed()
+
+    def _changed(self):
+        master = self._parent
+        if master is not None:
+            master._kerningChanged()
+
+    def _id(self, name):
+        ids = self._ids
+        try:
+            return ids[name]
+        except KeyError:
+            names = self._names
+            ids[name] = id_ = len(names)
+            names.append(name)
+            return id_
+
+    def _index(self, first, second):
+        ids = self._ids
+        try:
+            key = ids[first] << 32 | ids[second]
+        except KeyError:
+            return None
+        keys = self._keys
+        index = bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key:
+            return index
+        return None
+
+    def _range(self, first):
+        # the slice of the pairs of first
+        firstId = self._ids.get(first)
+        if firstId is None:
+            return 0, 0
+        keys = self._keys
+        return (bisect_left(keys, firstId << 32),
+                bisect_left(keys, (firstId + 1) << 32))
+
+    def _set(self, first, second, value):
+        key = self._id(first) << 32 | self._id(second)
+        keys = self._keys
+        index = bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key:
+            self._values[index] = value
+        else:
+            keys.insert(index, key)
+            self._values.insert(index, value)
+
+    def getPair(self, first, second, default=None):
+        index = self._index(first, second)
+        if index is None:
+            return default
+        value = self._values[index]
+        return int(value) if value.is_integer() else value
+
+    def pairs(self):
+        names = self._names
+        for key, value in zip(self._keys, self._values):
+            yield (names[key >> 32], names[key & 0xffffffff]), \
+                int(value) if value.is_integer() else value
+
+    def removePair(self, first, second):
+        index = self._index(first, second)
+        if index is None:
+            raise KeyError((first, second))
+        del self._keys[index]
+        del self._values[index]
+        self._changed()
+
+    def setPair(self, first, second, value):
+        self._set(first, second, value)
+        self._changed()
+
+    def setdefault(self, first, default=None):
+        # a view, so that e.g. setdefault(first, {})[second] = value works
+        if default and first not in self:
+            self[first] = default
+        return KerningRow(self, first)
+
+    def toDict(self):
+        rows = {}
+        for (first, second), value in self.pairs():
+            rows.setdefault(first, {})[second] = value
+        return rows
+
+
+class KerningRow(MutableMapping):
+    """
+    The {second: value} pairs of a first name in a KerningTable, as a live
+    view.
+    """
+
+    __slots__ = ("_first", "_table")
+
+    def __init__(self, table, first):
+        self._first = first
+        self._table = table
+
+    def __delitem__(self, second):
+        self._table.removePair(self._first, second)
+
+    def __getitem__(self, second):
+        value = self._table.getPair(self._first, second)
+        if value is None:
+            raise KeyError(second)
+        return value
+
+    def __iter__(self):
+        table = self._table
+        names = table._names
+        start, stop = table._range(self._first)
+        for key in table._keys[start:stop]:
+            yield names[key & 0xffffffff]
+
+    def __len__(self):
+        start, stop = self._table._range(self._first)
+        return stop - start
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def __setitem__(self, second, value):
+        self._table.setPair(self._first, second, value)
+
+
+def kerningFor(left, right, master, vertical=False):
+    """
+    Returns the kerning between two Glyphs in a master, 0 if there is none.
+
+    Pairs are looked up from the most specific to the least: glyph-glyph,
+    glyph-group, group-glyph then group-group. Groups are named with a
+    GROUP_PREFIX in kerning, and are the rightKerningGroup of the first glyph
+    and the leftKerningGroup of the second (bottom and top if *vertical*).
+    """
+    table = master.kerningTable(vertical)
+    get = table.getPair
+    first, second = left.name, right.name
+    value = get(first, second)
+    if value is not None:
+        return value
+    if vertical:
+        firstGroup, secondGroup = left.bottomKerningGroup, \
+            right.topKerningGroup
+    else:
+        firstGroup, secondGroup = left.rightKerningGroup, \
+            right.leftKerningGroup
+    if secondGroup:
+        secondGroup = GROUP_PREFIX + secondGroup
+        value = get(first, secondGroup)
+        if value is not None:
+            return value
+    if firstGroup:
+        firstGroup = GROUP_PREFIX + firstGroup
+        value = get(firstGroup, second)
+        if value is not None:
+            return value
+        if secondGroup:
+            value = get(firstGroup, secondGroup)
+            if value is not None:
+                return value
+    return 0
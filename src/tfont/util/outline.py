@@ -0,0 +1,174 @@
+from array import array
+from hashlib import sha1
+from tfont.objects.misc import Transformation
+from tfont.objects.path import Path
+from tfont.objects.point import Point
+from tfont.util.pointArray import SMOOTH, _typeCode, _types
+
+
+def _contours(layer, transformation, visited):
+    # (coords, types, smooth) of the layer paths and nested components,
+    # transformed
+    contours = []
+    for path in layer._paths:
+        points = path._points
+        if points.__class__ is list:
+            types = bytes(_typeCode(point.type) for point in points)
+            smooth = bytes(point.smooth for point in points)
+        else:
+            types = points._types.tobytes()
+            smooth = bytes(flags & SMOOTH for flags in points._flags)
+        contours.append((path._flatCoordinates(), types, smooth))
+    for component in layer._components:
+        for coords, types, smooth in componentContours(component, visited):
+            contours.append((array("d", coords), types, smooth))
+    if transformation:
+        for coords, _, _ in contours:
+            transformation.transformCoordinates(coords)
+    return contours
+
+
+def _glyphNames(layer):
+    # the glyph names components of the layer must not lead back to
+    glyph = layer._parent
+    return (glyph.name,) if glyph is not None else ()
+
+
+def componentContours(component, _visited=None):
+    """
+    Returns the contours of a component, nested components resolved, in the
+    coordinates of its layer: a list of (coords, types, smooth) tuples of a
+    flat array("d") of x, y values and bytes of point type codes and smooth
+    flags. The returned data is shared, do not modify it.
+
+    Contours are cached in the font outlineCache for each base glyph, master
+    and transformation, so that e.g. an accent is resolved once for all the
+    glyphs that use it in the same place. Components that lead back to a
+    glyph being resolved are skipped.
+    """
+    glyphName = component.glyphName
+    if _visited is None:
+        parent = component._parent
+        _visited = _glyphNames(parent) if parent is not None else ()
+    layer = component.layer
+    if glyphName in _visited or layer is None:
+        return []
+    transformation = Transformation(*component.transformation)
+    visited = _visited + (glyphName,)
+
+    def factory():
+        return _contours(layer, transformation, visited)
+
+    font = layer.font
+    if font is None:
+        return factory()
+    return font.outlineCache.fetch(
+        (glyphName, layer.masterName, tuple(transformation)),
+        factory, outlineVersion(layer, visited))
+
+
+def contoursPaths(contours):
+    """
+    Returns new Paths made from (coords, types, smooth) contours, as given by
+    componentContours().
+    """
+    paths = []
+    for coords, types, smooth in contours:
+        points = []
+        for index, code in enumerate(types):
+            x, y = coords[2*index], coords[2*index+1]
+            points.append(Point(
+                int(x) if x.is_integer() else x,
+                int(y) if y.is_integer() else y,
+                _types[code], bool(smooth[index])))
+        paths.append(Path(points))
+    return paths
+
+
+def decomposedPaths(layer):
+    """
+    Returns new Paths for the outlines of the layer components, as
+    Layer.decomposeComponents() would add them.
+    """
+    paths = []
+    for component in layer._components:
+        paths.extend(contoursPaths(componentContours(component)))
+    return paths
+
+
+def layerOutline(layer, tolerance=.5, _visited=None):
+    """
+    Returns the closed contours of a layer, components resolved, as flat
+    array("d") polylines within *tolerance* units of the curves.
+    """
+    if _visited is None:
+        _visited = _glyphNames(layer)
+    polylines = [
+        path.flatten(tolerance) for path in layer._paths if not path.open]
+    for component in layer._components:
+        glyphName = component.glyphName
+        componentLayer = component.layer
+        if glyphName in _visited or componentLayer is None:
+            continue
+        t = component.transformation
+        xScale, xyScale, yxScale, yScale, xOffset, yOffset = \
+            t.xScale, t.xyScale, t.yxScale, t.yScale, t.xOffset, t.yOffset
+        for polyline in layerOutline(
+                componentLayer, tolerance, _visited + (glyphName,)):
+            coords = array("d", polyline)
+            for index in range(0, len(coords), 2):
+                x, y = coords[index], coords[index+1]
+                coords[index] = x * xScale + y * yxScale + xOffset
+                coords[index+1] = y * yScale + x * xyScale + yOffset
+            polylines.append(coords)
+    return polylines
+
+
+def outlineHash(layer, _visited=None):
+    """
+    Returns a hex digest of the layer outline: its path points and its
+    components, whose outlines are hashed in turn. Equal outlines give the
+    same digest, across sessions.
+    """
+    if _visited is None:
+        _visited = _glyphNames(layer)
+    digest = sha1()
+    update = digest.update
+    for path in layer._paths:
+        update(b"p")
+        update(path._flatCoordinates().tobytes())
+        points = path._points
+        if points.__class__ is list:
+            update(bytes(_typeCode(point.type) for point in points))
+        else:
+            update(points._types.tobytes())
+    for component in layer._components:
+        glyphName = component.glyphName
+        update(b"c")
+        update(glyphName.encode("utf-8"))
+        update(array("d", component.transformation).tobytes())
+        componentLayer = component.layer
+        if glyphName not in _visited and componentLayer is not None:
+            update(outlineHash(
+                componentLayer, _visited + (glyphName,)).encode())
+    return digest.hexdigest()
+
+
+def outlineVersion(layer, _visited=None):
+    """
+    Returns a value that changes whenever the layer outline does: when the
+    layer or a layer its components resolve to changes, or is replaced
+    (layer serials are never reused).
+    """
+    if _visited is None:
+        _visited = _glyphNames(layer)
+    version = [layer._serial, layer._version]
+    for component in layer._components:
+        glyphName = component.glyphName
+        componentLayer = component.layer
+        if glyphName in _visited or componentLayer is None:
+            version.append(None)
+        else:
+            version.append(outlineVersion(
+                componentLayer, _visited + (glyphName,)))
+    return tuple(version)
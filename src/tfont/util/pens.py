@@ -0,0 +1,109 @@
+from fontTools.pens.basePen import PenError
+from fontTools.pens.pointPen import SegmentToPointPen
+from tfont.objects.component import Component
+from tfont.objects.misc import Transformation
+from tfont.objects.path import Path
+from tfont.objects.point import Point
+
+
+class LayerPointPen:
+    """
+    A fontTools point pen that adds contours and components to a layer.
+
+    Points are collected in a plain list and become a Path in one go, and
+    the paths and components drawn are added to the layer on close(), which
+    notifies it once. Use the pen as a context manager to close it. Point
+    names and identifiers go to extraData, as in UFOConverter.
+    """
+
+    __slots__ = ("_components", "_identifier", "_layer", "_paths",
+                 "_points")
+
+    def __init__(self, layer):
+        self._components = []
+        self._identifier = None
+        self._layer = layer
+        self._paths = []
+        self._points = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None,
+                     **kwargs):
+        self._components.append(
+            Component(baseGlyphName, Transformation(*transformation)))
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None,
+                 identifier=None, **kwargs):
+        points = self._points
+        if points is None:
+            raise PenError("Path not begun.")
+        point = Point(pt[0], pt[1], segmentType, smooth)
+        if name or identifier:
+            point._extraData = extraData = {}
+            if name:
+                extraData["name"] = name
+            if identifier:
+                extraData["id"] = identifier
+        points.append(point)
+
+    def beginPath(self, identifier=None, **kwargs):
+        if self._points is not None:
+            raise PenError("Path already begun.")
+        self._identifier = identifier
+        self._points = []
+
+    def close(self):
+        """
+        Adds the paths and components drawn so far to the layer.
+        """
+        layer = self._layer
+        paths, self._paths = self._paths, []
+        if paths:
+            layer.paths[len(layer._paths):] = paths
+        components, self._components = self._components, []
+        if components:
+            layer.components[len(layer._components):] = components
+
+    def endPath(self):
+        points = self._points
+        if points is None:
+            raise PenError("Path not begun.")
+        self._points = None
+        if not points:
+            return
+        if points[0].type != "move" and points[-1].type is None:
+            # closed paths end with an on-curve point
+            index = len(points) - 1
+            while index >= 0 and points[index].type is None:
+                index -= 1
+            if index >= 0:
+                points = points[index+1:] + points[:index+1]
+        path = Path(points)
+        if self._identifier:
+            path._extraData = {"id": self._identifier}
+        self._paths.append(path)
+
+
+class LayerPen(SegmentToPointPen):
+    """
+    A fontTools segment pen that adds outlines to a layer, through a
+    LayerPointPen. Close it, or use it as a context manager, likewise.
+    """
+
+    def __init__(self, layer):
+        self._pointPen = pointPen = LayerPointPen(layer)
+        super().__init__(pointPen)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._pointPen.close()
@@ -0,0 +1,526 @@
+from array import array
+from collections.abc import MutableSequence
+from tfont.objects.point import Point
+from tfont.util.tracker import bumpLayer, obj_setattr
+from uuid import uuid4
+from weakref import WeakValueDictionary
+
+# type codes, as stored in PointArray._types
+_types = (None, "move", "line", "curve", "qcurve")
+_typeCodes = {type_: code for code, type_ in enumerate(_types)}
+
+# flag bits, as stored in PointArray._flags
+SMOOTH = 1
+SELECTED = 2
+
+
+def _typeCode(value):
+    try:
+        return _typeCodes[value]
+    except KeyError:
+        raise ValueError("unsupported point type %r" % value)
+
+
+class PointArray(MutableSequence):
+    """
+    Compact storage for Path points: coordinates are interleaved in a flat
+    array of doubles, types and flags (smooth, selected) in byte arrays, ids
+    in an array of unsigned longs, and extra data in a sparse dict. That is
+    26 bytes per point on 64-bit platforms, plus about 200 bytes (proxy,
+    weak reference and dict entry) per point a proxy is alive for.
+
+    Items are handed out as PointProxy objects, they are created on demand and
+    kept around while referenced so identity holds (e.g. in Layer.selection).
+    Inserting a Point copies its data in; proxies that were removed from an
+    array (e.g. with pop) are reattached as-is.
+
+    Unlike with a plain list, the array maintains the layer selection itself as
+    selected points come and go.
+    """
+    __slots__ = ("_coords", "_extraData", "_flags", "_ids", "_lastId",
+                 "_parent", "_proxies", "_types")
+
+    def __init__(self, points=()):
+        self._coords = array("d")
+        self._extraData = None
+        self._flags = array("B")
+        self._ids = array("L")
+        self._lastId = 0
+        self._parent = None
+        self._proxies = None
+        self._types = array("B")
+        if points:
+            self._insert(0, list(points))
+
+    def __delitem__(self, key):
+        if key.__class__ is slice:
+            start, stop, step = key.indices(len(self._ids))
+            if step == 1:
+                if start < stop:
+                    self._remove(start, stop)
+            else:
+                for index in sorted(range(start, stop, step), reverse=True):
+                    self._remove(index, index + 1)
+        else:
+            index = self._index(key)
+            self._remove(index, index + 1)
+
+    def __getitem__(self, key):
+        if key.__class__ is slice:
+            proxy = self._proxy
+            return [proxy(i) for i in range(*key.indices(len(self._ids)))]
+        return self._proxy(self._index(key))
+
+    def __iter__(self):
+        proxy = self._proxy
+        for index in range(len(self._ids)):
+            yield proxy(index)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __repr__(self):
+        return repr(self[:])
+
+    def __setitem__(self, key, value):
+        if key.__class__ is slice:
+            start, stop, step = key.indices(len(self._ids))
+            values = list(value)
+            if step == 1:
+                if start < stop:
+                    self._remove(start, stop)
+                self._insert(start, values)
+            else:
+                indices = range(start, stop, step)
+                if len(indices) != len(values):
+                    raise ValueError(
+                        "attempt to assign sequence of size %d to extended "
+                        "slice of size %d" % (len(values), len(indices)))
+                for index, value in zip(indices, values):
+                    self._remove(index, index + 1)
+                    self._insert(index, (value,))
+        else:
+            index = self._index(key)
+            self._remove(index, index + 1)
+            self._insert(index, (value,))
+
+    def append(self, value):
+        self._insert(len(self._ids), (value,))
+
+    def clear(self):
+        if self._ids:
+            self._remove(0, len(self._ids))
+
+    def extend(self, values):
+        self._insert(len(self._ids), list(values))
+
+    def insert(self, index, value):
+        size = len(self._ids)
+        if index < 0:
+            index = max(index + size, 0)
+        elif index > size:
+            index = size
+        self._insert(index, (value,))
+
+    def reverse(self):
+        coords = self._coords
+        xs, ys = coords[::2], coords[1::2]
+        xs.reverse()
+        ys.reverse()
+        coords[::2], coords[1::2] = xs, ys
+        self._types.reverse()
+        self._flags.reverse()
+        self._ids.reverse()
+        proxies = self._proxies
+        if proxies:
+            last = len(self._ids) - 1
+            for proxy in proxies.values():
+                obj_setattr(proxy, "_index", last - proxy._index)
+
+    # internal
+
+    def _index(self, index):
+        size = len(self._ids)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("point index out of range")
+        return index
+
+    def _insert(self, index, values):
+        records = []
+        reattach = []
+        for value in values:
+            if value.__class__ is PointProxy:
+                if value._array is None and value not in reattach:
+                    reattach.append(value)
+                records.append(value._record())
+            else:
+                records.append((
+                    value.x, value.y, _typeCode(value.type),
+                    (SMOOTH if value.smooth else 0) |
+                    (SELECTED if value.selected else 0), value._extraData))
+        if not records:
+            return
+        coords = array("d")
+        types = array("B")
+        flags = array("B")
+        ids = array("L", range(
+            self._lastId + 1, self._lastId + len(records) + 1))
+        self._lastId += len(records)
+        extraData = self._extraData
+        for id_, (x, y, type_, flag, extra) in zip(ids, records):
+            coords.append(x)
+            coords.append(y)
+            types.append(type_)
+            flags.append(flag)
+            if extra:
+                if extraData is None:
+                    extraData = self._extraData = {}
+                extraData[id_] = extra
+        size = len(self._ids)
+        self._coords[2 * index:2 * index] = coords
+        self._types[index:index] = types
+        self._flags[index:index] = flags
+        self._ids[index:index] = ids
+        if index < size:
+            self._renumber(index, len(records))
+        if reattach:
+            proxies = self._proxies
+            if proxies is None:
+                proxies = self._proxies = WeakValueDictionary()
+            for offset, value in enumerate(values):
+                if value in reattach:
+                    reattach.remove(value)
+                    id_ = ids[offset]
+                    value._attach(self, id_, index + offset)
+                    proxies[id_] = value
+        # selection
+        path = self._parent
+        layer = path._parent if path is not None else None
+        if layer is not None:
+            selection = layer._selection
+            proxy = self._proxy
+            changed = False
+            for offset, flag in enumerate(flags):
+                if flag & SELECTED:
+                    selection.add(proxy(index + offset))
+                    changed = True
+            if changed:
+                layer._selectedPaths = layer._selectionBounds = None
+
+    def _proxy(self, index):
+        id_ = self._ids[index]
+        proxies = self._proxies
+        if proxies is None:
+            proxies = self._proxies = WeakValueDictionary()
+        else:
+            proxy = proxies.get(id_)
+            if proxy is not None:
+                obj_setattr(proxy, "_index", index)
+                return proxy
+        proxy = proxies[id_] = PointProxy(self, id_, index)
+        return proxy
+
+    def _remove(self, start, stop):
+        ids = self._ids
+        proxies = self._proxies
+        extraData = self._extraData
+        if proxies:
+            path = self._parent
+            layer = path._parent if path is not None else None
+            flags = self._flags
+            for index in range(start, stop):
+                proxy = proxies.pop(ids[index], None)
+                if proxy is None:
+                    continue
+                if layer is not None and flags[index] & SELECTED:
+                    layer._selection.discard(proxy)
+                    layer._selectedPaths = layer._selectionBounds = None
+                proxy._detach()
+        if extraData:
+            for id_ in ids[start:stop]:
+                extraData.pop(id_, None)
+        size = len(ids)
+        del self._coords[2 * start:2 * stop]
+        del self._types[start:stop]
+        del self._flags[start:stop]
+        del ids[start:stop]
+        if stop < size:
+            self._renumber(stop, start - stop)
+
+    def _renumber(self, start, offset):
+        # shifts the index live proxies cache past *start*, so they don't
+        # have to search for their point after an insertion or removal
+        proxies = self._proxies
+        if proxies:
+            for proxy in proxies.values():
+                index = proxy._index
+                if index >= start:
+                    obj_setattr(proxy, "_index", index + offset)
+
+
+class PointProxy:
+    """
+    A Point that lives in a PointArray. Has the same interface and change
+    tracking as Point.
+
+    Proxies removed from their array hold on to their data, and can be
+    inserted again.
+    """
+    __slots__ = "__weakref__", "_array", "_data", "_index", "_key"
+
+    def __init__(self, array, key, index):
+        obj_setattr(self, "_array", array)
+        obj_setattr(self, "_data", None)
+        obj_setattr(self, "_index", index)
+        obj_setattr(self, "_key", key)
+
+    def __copy__(self):
+        point = Point(self.x, self.y, self.type, self.smooth, self._extraData)
+        obj_setattr(point, "selected", self.selected)
+        return point
+
+    def __repr__(self):
+        type_ = self.type
+        if type_ is not None:
+            more = ", %r" % type_
+            if self.smooth:
+                more += ", smooth=%r" % self.smooth
+        else:
+            more = ""
+        return "Point(%r, %r%s)" % (self.x, self.y, more)
+
+    def _attach(self, array, key, index):
+        obj_setattr(self, "_array", array)
+        obj_setattr(self, "_data", None)
+        obj_setattr(self, "_index", index)
+        obj_setattr(self, "_key", key)
+
+    def _detach(self):
+        obj_setattr(self, "_data", list(self._record()))
+        obj_setattr(self, "_array", None)
+
+    def _locate(self):
+        index = self._index
+        ids = self._array._ids
+        try:
+            if ids[index] == self._key:
+                return index
+        except IndexError:
+            pass
+        index = ids.index(self._key)
+        obj_setattr(self, "_index", index)
+        return index
+
+    def _record(self):
+        array = self._array
+        if array is None:
+            return tuple(self._data)
+        index = self._locate()
+        coords = array._coords
+        extraData = array._extraData
+        return (coords[2 * index], coords[2 * index + 1], array._types[index],
+                array._flags[index],
+                extraData.get(self._key) if extraData else None)
+
+    # change tracking, mirrors Point.__setattr__
+
+    def _changed(self, key):
+        path = self._array._parent
+        if path is None:
+            return
+        layer = path._parent
+        if key == "selected":
+            if layer is None:
+                return
+            if self.selected:
+                layer._selection.add(self)
+            else:
+                layer._selection.discard(self)
+            layer._selectedPaths = layer._selectionBounds = None
+            return
+        path._version += 1
+        if key == "type":
+            path._segments = None
+        if key == "type" or key == "x" or key == "y":
+            path._bounds = path._flattened = path._graphicsPath = None
+            if layer is None:
+                return
+            if self.selected:
+                layer._selectedPaths = layer._selectionBounds = None
+            layer._bounds = None
+        if layer is None:
+            return
+        bumpLayer(layer)
+
+    def _getFlag(self, bit):
+        array = self._array
+        if array is None:
+            return bool(self._data[3] & bit)
+        return bool(array._flags[self._locate()] & bit)
+
+    def _setFlag(self, bit, value, key):
+        array = self._array
+        if array is None:
+            flags = self._data[3]
+            self._data[3] = flags | bit if value else flags & ~bit
+            return
+        index = self._locate()
+        flags = array._flags[index]
+        if bool(flags & bit) == bool(value):
+            return
+        array._flags[index] = flags | bit if value else flags & ~bit
+        self._changed(key)
+
+    def _setSelected(self, value):
+        # no change tracking, for bulk selection by the layer
+        array = self._array
+        if array is None:
+            self._setFlag(SELECTED, value, "selected")
+            return
+        index = self._locate()
+        flags = array._flags[index]
+        array._flags[index] = flags | SELECTED if value else flags & ~SELECTED
+
+    def _setCoord(self, offset, value, key):
+        array = self._array
+        if array is None:
+            self._data[offset] = float(value)
+            return
+        index = 2 * self._locate() + offset
+        coords = array._coords
+        if coords[index] == value:
+            return
+        coords[index] = value
+        self._changed(key)
+
+    @property
+    def x(self):
+        array = self._array
+        if array is None:
+            value = self._data[0]
+        else:
+            value = array._coords[2 * self._locate()]
+        return int(value) if value.is_integer() else value
+
+    @x.setter
+    def x(self, value):
+        self._setCoord(0, value, "x")
+
+    @property
+    def y(self):
+        array = self._array
+        if array is None:
+            value = self._data[1]
+        else:
+            value = array._coords[2 * self._locate() + 1]
+        return int(value) if value.is_integer() else value
+
+    @y.setter
+    def y(self, value):
+        self._setCoord(1, value, "y")
+
+    @property
+    def type(self):
+        array = self._array
+        if array is None:
+            return _types[self._data[2]]
+        return _types[array._types[self._locate()]]
+
+    @type.setter
+    def type(self, value):
+        code = _typeCode(value)
+        array = self._array
+        if array is None:
+            self._data[2] = code
+            return
+        index = self._locate()
+        if array._types[index] != code:
+            array._types[index] = code
+            self._changed("type")
+
+    @property
+    def smooth(self):
+        return self._getFlag(SMOOTH)
+
+    @smooth.setter
+    def smooth(self, value):
+        self._setFlag(SMOOTH, value, "smooth")
+
+    @property
+    def selected(self):
+        return self._getFlag(SELECTED)
+
+    @selected.setter
+    def selected(self, value):
+        self._setFlag(SELECTED, value, "selected")
+
+    @property
+    def _extraData(self):
+        array = self._array
+        if array is None:
+            return self._data[4]
+        extraData = array._extraData
+        if extraData:
+            return extraData.get(self._key)
+        return None
+
+    @_extraData.setter
+    def _extraData(self, value):
+        array = self._array
+        if array is None:
+            self._data[4] = value
+            return
+        extraData = array._extraData
+        if value is not None:
+            if extraData is None:
+                extraData = array._extraData = {}
+            extraData[self._key] = value
+        elif extraData:
+            extraData.pop(self._key, None)
+
+    @property
+    def _parent(self):
+        array = self._array
+        if array is not None:
+            return array._parent
+        return None
+
+    @_parent.setter
+    def _parent(self, value):
+        if value is not None:
+            raise TypeError(
+                "compact points can only be moved between compact paths, "
+                "copy() them first")
+
+    @property
+    def extraData(self):
+        extraData = self._extraData
+        if extraData is None:
+            extraData = self._extraData = {}
+        return extraData
+
+    @property
+    def id(self):
+        extraData = self.extraData
+        try:
+            return extraData["id"]
+        except KeyError:
+            extraData["id"] = id_ = str(uuid4())
+            return id_
+
+    @property
+    def _id(self):
+        return self.extraData.get("id", "")
+
+    @_id.setter
+    def _id(self, value):
+        if value:
+            self.extraData["id"] = value
+        else:
+            self.extraData.pop("id", None)
+
+    @property
+    def path(self):
+        return self._parent
@@ -0,0 +1,176 @@
+from hashlib import sha1
+import os
+from tfont.util.outline import layerOutline, outlineHash
+
+# bump when the rendering changes, to invalidate on-disk caches
+RASTER_VERSION = 1
+
+
+def _cachePath(cacheDir, key):
+    return os.path.join(cacheDir, key[:2], key + ".gray")
+
+
+def _fillSpan(coverage, offset, xa, xb, width, weight):
+    if xa < 0:
+        xa = 0
+    if xb > width:
+        xb = width
+    if xa >= xb:
+        return
+    ia, ib = int(xa), int(xb)
+    if ia == ib:
+        coverage[offset+ia] += (xb - xa) * weight
+        return
+    coverage[offset+ia] += (ia + 1 - xa) * weight
+    for index in range(offset + ia + 1, offset + ib):
+        coverage[index] += weight
+    if ib < width:
+        coverage[offset+ib] += (xb - ib) * weight
+
+
+def _render(polylines, width, height, box, samples):
+    # polylines to pixel space, y pointing down
+    left, bottom, right, top = box
+    scale = min(width / ((right - left) or 1), height / ((top - bottom) or 1))
+    dx = .5 * (width - (right - left) * scale) - left * scale
+    dy = .5 * (height - (top - bottom) * scale) + top * scale
+    transformed = []
+    for polyline in polylines:
+        transformed.append([
+            value * scale + dx if index % 2 == 0 else dy - value * scale
+            for index, value in enumerate(polyline)])
+    return rasterize(transformed, width, height, samples)
+
+
+def _tolerance(width, height, box):
+    # half a pixel is plenty
+    left, bottom, right, top = box
+    return .5 * max((right - left) / width, (top - bottom) / height, 1e-3)
+
+
+def defaultBox(layer):
+    """
+    Returns the (left, bottom, right, top) area shown in a layer thumbnail:
+    the advance width, and descender to ascender if the layer is part of a
+    font, else the layer bounds.
+    """
+    master = layer.master if layer.font is not None else None
+    if master is not None:
+        return 0, master.descender, layer.width, master.ascender
+    bounds = layer.bounds
+    if bounds is None:
+        return 0, 0, layer.width, 0
+    return bounds
+
+
+def rasterize(polylines, width, height, samples=4):
+    """
+    Fills closed polylines, flat sequences of x, y values in pixel space (y
+    pointing down), with the nonzero winding rule. Returns a bytearray of
+    width * height 8-bit coverage values, row by row from the top.
+
+    Each pixel row is sampled by *samples* scan lines, coverage along them
+    is exact.
+    """
+    edges = []
+    for polyline in polylines:
+        x0, y0 = polyline[-2], polyline[-1]
+        for index in range(0, len(polyline), 2):
+            x1, y1 = polyline[index], polyline[index+1]
+            if y0 < y1:
+                edges.append((y0, y1, x0, (x1 - x0) / (y1 - y0), 1))
+            elif y1 < y0:
+                edges.append((y1, y0, x1, (x0 - x1) / (y0 - y1), -1))
+            x0, y0 = x1, y1
+    edges.sort()
+    coverage = [0.] * (width * height)
+    weight = 1 / samples
+    active = []
+    edgeIndex = 0
+    for row in range(height):
+        offset = row * width
+        for sample in range(samples):
+            y = row + (sample + .5) * weight
+            while edgeIndex < len(edges) and edges[edgeIndex][0] <= y:
+                active.append(edges[edgeIndex])
+                edgeIndex += 1
+            active = [edge for edge in active if edge[1] > y]
+            if not active:
+                continue
+            crossings = sorted(
+                (x + (y - yMin) * slope, direction)
+                for yMin, _, x, slope, direction in active)
+            winding = 0
+            for x, direction in crossings:
+                if winding:
+                    _fillSpan(coverage, offset, start, x, width, weight)
+                winding += direction
+                start = x
+    return bytearray(
+        min(255, int(value * 255 + .5)) for value in coverage)
+
+
+def renderLayer(layer, width, height, box=None, samples=4):
+    """
+    Renders a layer, components resolved, into a width * height bytearray
+    of 8-bit coverage values (see rasterize()). *box*, the (left, bottom,
+    right, top) area to fit in the image, defaults to defaultBox(layer).
+    """
+    if box is None:
+        box = defaultBox(layer)
+    return _render(
+        layerOutline(layer, _tolerance(width, height, box)), width, height,
+        box, samples)
+
+
+def renderLayers(layers, width, height, workers=None, cacheDir=None,
+                 samples=4):
+    """
+    Renders many layers as renderLayer() does, with default boxes. With
+    *workers*, layers are rendered in a process pool.
+
+    If *cacheDir* is given, images are stored there under a hash of the
+    layer outline, box and size, and only layers without an image on disk
+    are rendered.
+    """
+    images = []
+    jobs = []
+    for layer in layers:
+        box = defaultBox(layer)
+        key = None
+        if cacheDir is not None:
+            key = sha1(("%s-%d-%r-%dx%d-%d" % (
+                outlineHash(layer), RASTER_VERSION, box, width, height,
+                samples)).encode()).hexdigest()
+            try:
+                with open(_cachePath(cacheDir, key), "rb") as file:
+                    images.append(bytearray(file.read()))
+                continue
+            except OSError:
+                pass
+        images.append(None)
+        jobs.append((
+            len(images) - 1, key,
+            layerOutline(layer, _tolerance(width, height, box)), box))
+    if workers and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [
+                executor.submit(
+                    _render, polylines, width, height, box, samples)
+                for _, _, polylines, box in jobs]
+            results = [future.result() for future in futures]
+    else:
+        results = [
+            _render(polylines, width, height, box, samples)
+            for _, _, polylines, box in jobs]
+    for (index, key, _, _), image in zip(jobs, results):
+        images[index] = image
+        if key is not None:
+            path = _cachePath(cacheDir, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as file:
+                file.write(image)
+            os.replace(path + ".tmp", path)
+    return images
+
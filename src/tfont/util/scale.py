@@ -0,0 +1,107 @@
+from array import array
+from math import floor
+from tfont.objects.misc import AlignmentZone
+from tfont.util.tracker import obj_setattr
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def scaleCoordinates(coords, factor, round=True):
+    """
+    Scales a flat array("d") of coordinates in place, in one go with NumPy if
+    available. If *round* is set, values are rounded half up to integers.
+    """
+    if np is not None:
+        values = np.frombuffer(coords, dtype=float)
+        values *= factor
+        if round:
+            np.floor(values + .5, out=values)
+        return
+    if round:
+        for index, value in enumerate(coords):
+            coords[index] = floor(value * factor + .5)
+    else:
+        for index, value in enumerate(coords):
+            coords[index] = value * factor
+
+
+def scaleValue(value, factor, round=True):
+    value *= factor
+    if round:
+        return floor(value + .5)
+    return int(value) if value.is_integer() else value
+
+
+def scaleGlyph(glyph, factor, round=True):
+    """
+    Scales the geometry and metrics of all glyph layers by *factor*, without
+    per-element change tracking. Caches are cleared and versions bumped once
+    per path and layer, then once for the glyph.
+    """
+    for layer in glyph._layers:
+        scaleLayer(layer, factor, round)
+    glyph._version += 1
+
+
+def scaleLayer(layer, factor, round=True):
+    paths = [path for path in layer._paths if path._points]
+    if paths:
+        coords = array("d")
+        for path in paths:
+            coords.extend(path._flatCoordinates())
+        scaleCoordinates(coords, factor, round)
+        start = 0
+        for path in paths:
+            end = start + 2 * len(path._points)
+            path._writeFlatCoordinates(coords[start:end])
+            path._bounds = path._flattened = path._graphicsPath = None
+            path._version += 1
+            start = end
+    for anchor in layer._anchors.values():
+        obj_setattr(anchor, "x", scaleValue(anchor.x, factor, round))
+        obj_setattr(anchor, "y", scaleValue(anchor.y, factor, round))
+    for component in layer._components:
+        transformation = component.transformation
+        obj_setattr(transformation, "xOffset", scaleValue(
+            transformation.xOffset, factor, round))
+        obj_setattr(transformation, "yOffset", scaleValue(
+            transformation.yOffset, factor, round))
+    for guideline in layer._guidelines:
+        obj_setattr(guideline, "x", scaleValue(guideline.x, factor, round))
+        obj_setattr(guideline, "y", scaleValue(guideline.y, factor, round))
+    obj_setattr(layer, "width", scaleValue(layer.width, factor, round))
+    obj_setattr(layer, "height", scaleValue(layer.height, factor, round))
+    if layer.yOrigin is not None:
+        obj_setattr(layer, "yOrigin", scaleValue(
+            layer.yOrigin, factor, round))
+    layer._bounds = layer._selectionBounds = None
+    layer._version += 1
+
+
+def scaleMaster(master, factor, round=True):
+    """
+    Scales the vertical metrics, alignment zones, stems, guidelines and
+    kerning of a master by *factor*.
+    """
+    for attr in ("ascender", "capHeight", "descender", "xHeight"):
+        obj_setattr(master, attr, scaleValue(
+            getattr(master, attr), factor, round))
+    master.alignmentZones = [
+        AlignmentZone(
+            scaleValue(zone.position, factor, round),
+            scaleValue(zone.size, factor, round))
+        for zone in master.alignmentZones]
+    master.hStems = [
+        scaleValue(stem, factor, round) for stem in master.hStems]
+    master.vStems = [
+        scaleValue(stem, factor, round) for stem in master.vStems]
+    for guideline in master._guidelines:
+        obj_setattr(guideline, "x", scaleValue(guideline.x, factor, round))
+        obj_setattr(guideline, "y", scaleValue(guideline.y, factor, round))
+    for table in (master.hKerning, master.vKerning):
+        if table:
+            scaleCoordinates(table._values, factor, round)
+            table._changed()
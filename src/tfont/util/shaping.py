@@ -0,0 +1,142 @@
+from tfont.util.kerning import kerningFor
+
+# features applied when shaping, unless told otherwise
+DEFAULT_FEATURES = ("ccmp", "locl", "rlig", "liga", "clig", "calt")
+
+
+def _lookupIndices(gsub, features):
+    # lookups of the requested features in the default script and language,
+    # in lookup order
+    table = gsub.table
+    if table.FeatureList is None or table.LookupList is None:
+        return []
+    records = table.FeatureList.FeatureRecord
+    featureIndices = None
+    scripts = table.ScriptList.ScriptRecord if table.ScriptList else ()
+    for scriptTag in ("DFLT", "latn"):
+        for record in scripts:
+            if record.ScriptTag == scriptTag:
+                langSys = record.Script.DefaultLangSys
+                if langSys is not None:
+                    featureIndices = langSys.FeatureIndex
+                break
+        if featureIndices is not None:
+            break
+    if featureIndices is None:
+        featureIndices = range(len(records))
+    lookupIndices = set()
+    for index in featureIndices:
+        record = records[index]
+        if record.FeatureTag in features:
+            lookupIndices.update(record.Feature.LookupListIndex)
+    return sorted(lookupIndices)
+
+
+def _masterLayer(glyph, masterName):
+    for layer in glyph._layers:
+        if not layer._name and layer.masterName == masterName:
+            return layer
+
+
+def _substitute(lookupType, subtables, names, index):
+    # applies the first matching subtable at index, returns how many glyphs
+    # it consumed and what they became, or None
+    name = names[index]
+    for subtable in subtables:
+        if lookupType == 1:
+            if name in subtable.mapping:
+                return 1, [subtable.mapping[name]]
+        elif lookupType == 2:
+            if name in subtable.mapping:
+                return 1, list(subtable.mapping[name])
+        elif lookupType == 3:
+            if name in subtable.alternates:
+                return 1, [subtable.alternates[name][0]]
+        elif lookupType == 4:
+            for ligature in subtable.ligatures.get(name, ()):
+                components = list(ligature.Component)
+                end = index + 1 + len(components)
+                if names[index+1:end] == components:
+                    return end - index, [ligature.LigGlyph]
+
+
+def applySubstitutions(gsub, names, features=DEFAULT_FEATURES):
+    """
+    Applies the single, multiple, alternate (the first one) and ligature
+    substitutions of *features* in a fontTools GSUB table to a list of glyph
+    names, and returns the result. Lookup flags and contextual lookups are
+    not supported.
+    """
+    lookups = gsub.table.LookupList.Lookup
+    for lookupIndex in _lookupIndices(gsub, features):
+        lookup = lookups[lookupIndex]
+        lookupType = lookup.LookupType
+        subtables = lookup.SubTable
+        if lookupType == 7:
+            if not subtables:
+                continue
+            lookupType = subtables[0].ExtensionLookupType
+            subtables = [subtable.ExtSubTable for subtable in subtables]
+        if not 1 <= lookupType <= 4:
+            continue
+        result = []
+        index = 0
+        while index < len(names):
+            substitution = _substitute(lookupType, subtables, names, index)
+            if substitution is None:
+                result.append(names[index])
+                index += 1
+            else:
+                count, glyphNames = substitution
+                result.extend(glyphNames)
+                index += count
+        names = result
+    return names
+
+
+def shapeText(font, text, masterName, features=DEFAULT_FEATURES):
+    """
+    Shapes text left-to-right with the font cmap, GSUB substitutions (see
+    applySubstitutions()), advance widths and kerning of the given master,
+    groups resolved (see kerningFor()). Substitutions come from the font
+    layoutEngine tables, if it has them (see LayoutEngine) and no error.
+
+    Returns (glyphIds, advances, offsets, glyphs): tuples of glyph indices
+    in font.glyphs, advances with kerning applied, (x, y) offsets and the
+    Glyph objects that were used. Characters without a glyph map to
+    .notdef if there is one, else they are dropped.
+    """
+    glyphs = font._glyphs
+    glyphIdForName = font.glyphIdForName
+    notdef = glyphIdForName(".notdef")
+    names = []
+    for char in text:
+        gid = font.glyphIdForCodepoint(ord(char), notdef)
+        if gid is not None:
+            names.append(glyphs[gid].name)
+    if features and names:
+        # engines from a host layoutEngineFactory may not compile tables
+        engine = font.layoutEngine
+        if getattr(engine, "error", None) is None:
+            gsub = getattr(engine, "tables", {}).get("GSUB")
+            if gsub is not None:
+                names = applySubstitutions(gsub, names, features)
+    glyphIds = []
+    advances = []
+    usedGlyphs = []
+    for name in names:
+        gid = glyphIdForName(name)
+        if gid is None:
+            continue
+        glyph = glyphs[gid]
+        layer = _masterLayer(glyph, masterName)
+        glyphIds.append(gid)
+        advances.append(layer.width if layer is not None else 0)
+        usedGlyphs.append(glyph)
+    master = font._masters[masterName]
+    if master.kerningTable():
+        for index in range(len(usedGlyphs) - 1):
+            advances[index] += kerningFor(
+                usedGlyphs[index], usedGlyphs[index+1], master)
+    return (tuple(glyphIds), tuple(advances), ((0, 0),) * len(glyphIds),
+            tuple(usedGlyphs))
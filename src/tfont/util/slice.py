@@ -1,6 +1,8 @@
 from copy import copy
 from functools import partial
 from tfont.objects.path import Path
+from tfont.objects.point import Point
+from tfont.util.bezierMath import lineIntersectsRect
 
 
 def bytwo(iterable):
@@ -33,6 +35,9 @@ def makePath(endSegment, segmentsMap, path=None, targetSegment=None):
             if isJump or isLast and point.type is not None:
                 point = copy(point)
                 point.smooth = False
+            elif point.__class__ is not Point:
+                # compact storage proxy
+                point = copy(point)
             point._parent = path
             points.append(point)
         if isLast:
@@ -57,8 +62,19 @@ def slicePaths(layer, x1, y1, x2, y2):
     splitSegments = []
     for path in paths:
         segments = path.segments
-        index = 0
+        # only solve for segments whose box the line crosses
+        bounds = path.bounds
+        if bounds is None or not lineIntersectsRect(x1, y1, x2, y2, *bounds):
+            pathSegments.append(segments)
+            continue
+        boxes = path._segmentBoxes()
+        index = splits = 0
         while index < len(segments):
+            # each split shifts the segments from their boxes by one
+            if not lineIntersectsRect(
+                    x1, y1, x2, y2, *boxes[index - splits]):
+                index += 1
+                continue
             segment = segments[index]
             intersections = segment.intersectLine(x1, y1, x2, y2)
             if not intersections:
@@ -71,6 +87,7 @@ def slicePaths(layer, x1, y1, x2, y2):
                 segments.iterfrom(index)
             ))
             index += 2
+            splits += 1
         pathSegments.append(segments)
     size = len(splitSegments)
     if size < 2:
@@ -95,6 +112,8 @@ def slicePaths(layer, x1, y1, x2, y2):
             if segment in segmentsMap:
                 newPath = makePath(segment, segmentsMap)
                 newPath._parent = layer
+                if path.compacted:
+                    newPath.compact()
                 newPaths.append(newPath)
         if newPath is None:
             newPaths.append(path)
@@ -0,0 +1,190 @@
+from array import array
+from math import floor, inf, sqrt
+from tfont.util import bezierMath
+from tfont.util.flatten import flattenSegment
+
+
+class SpatialIndex:
+    """
+    A uniform grid over the points (path points and anchors) and segments of
+    a layer. Segments are filed in the cells they cross, curves by way of a
+    polyline within a quarter cell of them.
+
+    The index is a snapshot: *version* holds the layer version it was built
+    for, it must be rebuilt once the layer changes.
+    """
+
+    __slots__ = ("_cellSize", "_points", "_pointCells", "_segmentCells",
+                 "version")
+
+    def __init__(self, layer):
+        self.version = layer._version
+        # (container, index, x, y) so we needn't make proxies until queried
+        points = self._points = []
+        append = points.append
+        segments = []
+        for path in layer._paths:
+            storage = path._points
+            coords = path._flatCoordinates()
+            for index in range(len(storage)):
+                append((storage, index, coords[2*index], coords[2*index+1]))
+            segments.extend(path.segments)
+        anchors = list(layer._anchors.values())
+        for index, anchor in enumerate(anchors):
+            append((anchors, index, anchor.x, anchor.y))
+        # size cells for a handful of points each
+        if points:
+            xs = [point[2] for point in points]
+            ys = [point[3] for point in points]
+            width, height = max(xs) - min(xs), max(ys) - min(ys)
+            count = len(points)
+            cellSize = max(
+                2 * sqrt(width * height / count), max(width, height) / count)
+        else:
+            cellSize = 0
+        cellSize = self._cellSize = max(cellSize, 1)
+        pointCells = self._pointCells = {}
+        for item in points:
+            key = floor(item[2] / cellSize), floor(item[3] / cellSize)
+            try:
+                pointCells[key].append(item)
+            except KeyError:
+                pointCells[key] = [item]
+        segmentCells = self._segmentCells = {}
+        tolerance = .25 * cellSize
+        for segment in segments:
+            coords = segment.coordinates
+            coords_len = len(coords)
+            if coords_len == 4:
+                cells = self._lineCells(*coords)
+            elif coords_len == 8:
+                if segment.type == "curve":
+                    polyline = array("d", coords[:2])
+                    flattenSegment(segment, tolerance, polyline)
+                    cells = set()
+                    for i in range(0, len(polyline) - 2, 2):
+                        cells.update(self._lineCells(*polyline[i:i+4]))
+                else:
+                    xs, ys = coords[::2], coords[1::2]
+                    cells = self._cells(min(xs), min(ys), max(xs), max(ys))
+            else:
+                # move, or quads which we don't hit test
+                continue
+            item = segment, coords
+            for key in cells:
+                try:
+                    segmentCells[key].append(item)
+                except KeyError:
+                    segmentCells[key] = [item]
+
+    def _cells(self, left, bottom, right, top):
+        cellSize = self._cellSize
+        x0, x1 = floor(left / cellSize), floor(right / cellSize)
+        y0, y1 = floor(bottom / cellSize), floor(top / cellSize)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield x, y
+
+    def _cellItems(self, cells, left, bottom, right, top):
+        # clip the scanned cells to those that hold something
+        cellSize = self._cellSize
+        if (right - left) * (top - bottom) > len(cells) * cellSize * \
+                cellSize:
+            for (x, y), items in cells.items():
+                if left <= (x + 1) * cellSize and x * cellSize <= right and \
+                        bottom <= (y + 1) * cellSize and y * cellSize <= top:
+                    yield items
+            return
+        for key in self._cells(left, bottom, right, top):
+            items = cells.get(key)
+            if items is not None:
+                yield items
+
+    def _lineCells(self, x0, y0, x1, y1):
+        # walk the grid along the line, one cell crossing at a time
+        cellSize = self._cellSize
+        x, y = floor(x0 / cellSize), floor(y0 / cellSize)
+        endX, endY = floor(x1 / cellSize), floor(y1 / cellSize)
+        yield x, y
+        dx, dy = x1 - x0, y1 - y0
+        stepX = 1 if dx > 0 else -1
+        stepY = 1 if dy > 0 else -1
+        # line parameter at the next vertical/horizontal cell border
+        if dx:
+            tDeltaX = cellSize / abs(dx)
+            tMaxX = ((x + (dx > 0)) * cellSize - x0) / dx
+        else:
+            tDeltaX = tMaxX = inf
+        if dy:
+            tDeltaY = cellSize / abs(dy)
+            tMaxY = ((y + (dy > 0)) * cellSize - y0) / dy
+        else:
+            tDeltaY = tMaxY = inf
+        for _ in range(abs(endX - x) + abs(endY - y)):
+            if tMaxX < tMaxY:
+                x += stepX
+                tMaxX += tDeltaX
+            else:
+                y += stepY
+                tMaxY += tDeltaY
+            yield x, y
+
+    def itemsInRect(self, rect):
+        """
+        Yields (container, index, x, y) for the points within rect, the
+        point being container[index].
+        """
+        left, bottom, right, top = rect
+        for items in self._cellItems(self._pointCells, *rect):
+            for item in items:
+                x, y = item[2], item[3]
+                if left <= x <= right and bottom <= y <= top:
+                    yield item
+
+    def nearestPoint(self, x, y, radius):
+        nearest = None
+        minSqDist = radius * radius
+        for items in self._cellItems(
+                self._pointCells, x - radius, y - radius, x + radius,
+                y + radius):
+            for item in items:
+                dx, dy = item[2] - x, item[3] - y
+                sqDist = dx * dx + dy * dy
+                if sqDist <= minSqDist:
+                    minSqDist = sqDist
+                    nearest = item
+        if nearest is not None:
+            return nearest[0][nearest[1]]
+        return None
+
+    def pointsInRect(self, rect):
+        return [
+            container[index]
+            for container, index, _, _ in self.itemsInRect(rect)]
+
+    def segmentsNear(self, x, y, radius):
+        seen = set()
+        hits = []
+        sqRadius = radius * radius
+        # curves were filed by a polyline that may stray a quarter cell
+        pad = radius + .25 * self._cellSize
+        for items in self._cellItems(
+                self._segmentCells, x - pad, y - pad, x + pad, y + pad):
+            for segment, coords in items:
+                key = id(segment)
+                if key in seen:
+                    continue
+                seen.add(key)
+                if len(coords) == 4:
+                    px, py, _ = bezierMath.lineProjectionXY(x, y, *coords)
+                elif len(coords) == 8:
+                    px, py, _ = bezierMath.curveProjectionXY(x, y, *coords)
+                else:
+                    # quads?
+                    continue
+                dx, dy = px - x, py - y
+                sqDist = dx * dx + dy * dy
+                if sqDist <= sqRadius:
+                    hits.append((sqDist, len(hits), segment))
+        hits.sort()
+        return [segment for _, _, segment in hits]
@@ -0,0 +1,283 @@
+from array import array
+from collections import Counter
+from fontTools.misc import bezierTools
+from math import pi
+from tfont.util.outline import decomposedPaths
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Stems are measured along scan lines: horizontal lines (at given y) cross
+# vertical stems, vertical lines (at given x) cross horizontal stems. Runs of
+# ink are paired from the sorted crossings, even-odd. Segments are crossed
+# in [min, max) along the scan axis, so that a vertex on a scan line counts
+# once where the outline passes through it, and twice or not at all at an
+# extremum.
+
+
+def _cubicRoots(a, b, c, d):
+    # vectorized bezierTools.solveCubic, real roots or nan in shape (N, 3)
+    roots = np.full((len(a), 3), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cubic = np.abs(a) > 1e-10
+        quadratic = ~cubic & (np.abs(b) > 1e-10)
+        linear = ~cubic & ~quadratic & (np.abs(c) > 1e-10)
+        # cubic
+        ac = a[cubic]
+        A, B, C = b[cubic] / ac, c[cubic] / ac, d[cubic] / ac
+        Q = (A * A - 3 * B) / 9
+        R = (2 * A * A * A - 9 * A * B + 27 * C) / 54
+        Q3 = Q * Q * Q
+        three = R * R < Q3
+        theta = np.arccos(np.clip(R / np.sqrt(np.abs(Q3)), -1, 1))
+        sqrtQ = -2 * np.sqrt(np.abs(Q))
+        r = np.full((len(A), 3), np.nan)
+        for k in range(3):
+            r[:, k] = np.where(
+                three, sqrtQ * np.cos((theta + 2 * k * pi) / 3) - A / 3,
+                np.nan)
+        S = -np.sign(R) * np.cbrt(
+            np.abs(R) + np.sqrt(np.maximum(R * R - Q3, 0)))
+        T = np.where(S != 0, Q / S, 0)
+        r[:, 0] = np.where(three, r[:, 0], S + T - A / 3)
+        roots[cubic] = r
+        # quadratic
+        bq, cq, dq = b[quadratic], c[quadratic], d[quadratic]
+        sqrtDelta = np.sqrt(cq * cq - 4 * bq * dq)
+        roots[quadratic, 0] = (-cq + sqrtDelta) / (2 * bq)
+        roots[quadratic, 1] = (-cq - sqrtDelta) / (2 * bq)
+        # linear
+        roots[linear, 0] = -d[linear] / c[linear]
+    return roots
+
+
+def _crossings(curves, curveOwners, lines, lineOwners, positions, vertical):
+    """
+    Returns, per owner, per scan line, the sorted positions where the scan
+    line crosses the segments. *positions* is a list of the scan line
+    positions of each owner.
+    """
+    # the scan axis, and the axis along which runs are measured
+    axis, other = (0, 1) if vertical else (1, 0)
+    result = [[[] for _ in owned] for owned in positions]
+    for index in range(max(map(len, positions), default=0)):
+        if np is not None:
+            scan = np.array([
+                owned[index] if index < len(owned) else np.nan
+                for owned in positions])
+            for owners, values in (
+                    _lineCrossings(lines, lineOwners, scan, axis, other),
+                    _curveCrossings(curves, curveOwners, scan, axis, other)):
+                for owner, value in zip(owners, values):
+                    result[owner][index].append(value)
+            continue
+        for i in range(0, len(lines), 4):
+            owner = lineOwners[i // 4]
+            owned = positions[owner]
+            if index >= len(owned):
+                continue
+            s0, q0, s1, q1 = lines[i+axis], lines[i+other], \
+                lines[i+2+axis], lines[i+2+other]
+            pos = owned[index]
+            if s0 <= pos < s1 or s1 <= pos < s0:
+                t = (pos - s0) / (s1 - s0)
+                result[owner][index].append(q0 + t * (q1 - q0))
+        for i in range(0, len(curves), 8):
+            owner = curveOwners[i // 8]
+            owned = positions[owner]
+            if index >= len(owned):
+                continue
+            s0, s1, s2, s3 = curves[i+axis:i+8:2]
+            q0, q1, q2, q3 = curves[i+other:i+8:2]
+            pos = owned[index]
+            values = result[owner][index]
+            # endpoints on the scan line count if the curve is above it there
+            for t in bezierTools.solveCubic(
+                    -s0 + 3 * s1 - 3 * s2 + s3, 3 * s0 - 6 * s1 + 3 * s2,
+                    3 * s1 - 3 * s0, s0 - pos):
+                if 0 < t < 1 and not (s0 == pos and t < 1e-9 or
+                                      s3 == pos and t > 1 - 1e-9):
+                    mt = 1 - t
+                    values.append(
+                        mt * mt * mt * q0 + 3 * mt * mt * t * q1 +
+                        3 * mt * t * t * q2 + t * t * t * q3)
+            if s0 == pos and _rises(s0, s1, s2, s3):
+                values.append(q0)
+            if s3 == pos and _rises(s3, s2, s1, s0):
+                values.append(q3)
+    for owned in result:
+        for values in owned:
+            values.sort()
+    return result
+
+
+def _curveCrossings(curves, curveOwners, scan, axis, other):
+    if not curves:
+        return (), ()
+    p = np.frombuffer(curves, dtype=float).reshape(-1, 4, 2)
+    owners = np.frombuffer(curveOwners, dtype=np.int64)
+    s0, s1, s2, s3 = (p[:, k, axis] for k in range(4))
+    roots = _cubicRoots(
+        -s0 + 3 * s1 - 3 * s2 + s3, 3 * s0 - 6 * s1 + 3 * s2,
+        3 * s1 - 3 * s0, s0 - scan[owners])
+    pos = scan[owners][:, None]
+    valid = (roots > 0) & (roots < 1) & \
+        ~((s0[:, None] == pos) & (roots < 1e-9)) & \
+        ~((s3[:, None] == pos) & (roots > 1 - 1e-9))
+    rows, _ = np.nonzero(valid)
+    t = roots[valid]
+    mt = 1 - t
+    q = p[rows, :, other]
+    values = (mt * mt * mt * q[:, 0] + 3 * mt * mt * t * q[:, 1] +
+              3 * mt * t * t * q[:, 2] + t * t * t * q[:, 3])
+    # endpoints on the scan line count if the curve is above it there
+    pos = pos[:, 0]
+    starts, = np.nonzero((s0 == pos) & np.where(
+        s1 != s0, s1 > s0, np.where(s2 != s0, s2 > s0, s3 > s0)))
+    ends, = np.nonzero((s3 == pos) & np.where(
+        s2 != s3, s2 > s3, np.where(s1 != s3, s1 > s3, s0 > s3)))
+    return (
+        np.concatenate((owners[rows], owners[starts], owners[ends])).tolist(),
+        np.concatenate((values, p[starts, 0, other], p[ends, 3, other]))
+        .tolist())
+
+
+def _lineCrossings(lines, lineOwners, scan, axis, other):
+    if not lines:
+        return (), ()
+    p = np.frombuffer(lines, dtype=float).reshape(-1, 2, 2)
+    owners = np.frombuffer(lineOwners, dtype=np.int64)
+    pos = scan[owners]
+    s0, s1 = p[:, 0, axis], p[:, 1, axis]
+    valid = ((s0 <= pos) & (pos < s1)) | ((s1 <= pos) & (pos < s0))
+    s0, s1, pos = s0[valid], s1[valid], pos[valid]
+    q0, q1 = p[valid, 0, other], p[valid, 1, other]
+    values = q0 + (pos - s0) / (s1 - s0) * (q1 - q0)
+    return owners[valid].tolist(), values.tolist()
+
+
+def _rises(s0, s1, s2, s3):
+    # whether a curve leaves s0 upwards, which the first control value off s0
+    # tells
+    for s in (s1, s2, s3):
+        if s != s0:
+            return s > s0
+    return False
+
+
+def _segments(layers):
+    curves, curveOwners = array("d"), array("q")
+    lines, lineOwners = array("d"), array("q")
+    for owner, layer in enumerate(layers):
+        paths = layer._paths
+        if layer._components:
+            paths = list(paths)
+            paths.extend(decomposedPaths(layer))
+        for path in paths:
+            for segment in path.segments:
+                coords = segment.coordinates
+                coords_len = len(coords)
+                if coords_len == 4:
+                    lines.extend(coords)
+                    lineOwners.append(owner)
+                elif coords_len == 8:
+                    curves.extend(coords)
+                    curveOwners.append(owner)
+    return curves, curveOwners, lines, lineOwners
+
+
+def scanRuns(layers, positions, vertical=False, workers=None):
+    """
+    Intersects the paths of each layer with horizontal scan lines (vertical
+    ones if *vertical* is set) and returns the runs of ink along them: per
+    layer, per scan line, a list of (start, end) pairs.
+
+    *positions* is a sequence of scan line coordinates shared by all layers,
+    or a callable that returns them for a given layer. Components are
+    decomposed.
+    Crossings of all layers are solved in one vectorized batch if NumPy is
+    installed; with *workers*, batches of layers go to a process pool.
+    """
+    layers = list(layers)
+    if callable(positions):
+        positions = [list(positions(layer)) for layer in layers]
+    else:
+        positions = [list(positions)] * len(layers)
+    if workers and len(layers) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        size = -(-len(layers) // workers)
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [
+                executor.submit(
+                    _crossings, *_segments(layers[start:start+size]),
+                    positions[start:start+size], vertical)
+                for start in range(0, len(layers), size)]
+            crossings = []
+            for future in futures:
+                crossings.extend(future.result())
+    else:
+        crossings = _crossings(*_segments(layers), positions, vertical)
+    return [
+        [list(zip(values[::2], values[1::2])) for values in owned]
+        for owned in crossings]
+
+
+def measureStems(font, master=None, workers=None):
+    """
+    Measures the stems of the glyphs of a master (the selected one by
+    default), and returns histograms of (horizontal, vertical) stem widths,
+    rounded to units.
+
+    Vertical stems are measured at half the xHeight, horizontal stems at
+    half the advance width of each glyph.
+    """
+    if master is None:
+        master = font.selectedMaster
+    elif master.__class__ is str:
+        master = font.masters[master]
+    name = master.name
+    layers = []
+    for glyph in font._glyphs:
+        for layer in glyph._layers:
+            if not layer._name and layer.masterName == name:
+                layers.append(layer)
+                break
+    vRuns = scanRuns(layers, (.5 * master.xHeight,), workers=workers)
+    hRuns = scanRuns(
+        layers, lambda layer: (.5 * layer.width,), vertical=True,
+        workers=workers)
+    return stemsHistogram(hRuns), stemsHistogram(vRuns)
+
+
+def stemsHistogram(runs):
+    """
+    Returns a Counter of the rounded run widths out of scanRuns() results.
+    """
+    histogram = Counter()
+    for owned in runs:
+        for values in owned:
+            for start, end in values:
+                histogram[round(end - start)] += 1
+    return histogram
+
+
+def suggestStems(histogram, count=2, tolerance=2):
+    """
+    Returns up to *count* stem widths out of a stems histogram, the most
+    frequent first, counting widths within *tolerance* units of each other
+    together. The result can be assigned to Master.hStems/vStems.
+    """
+    scores = {
+        width: sum(histogram.get(width + delta, 0)
+                   for delta in range(-tolerance, tolerance + 1))
+        for width in histogram if width > 0}
+    stems = []
+    for width in sorted(scores, key=lambda width: (-scores[width], width)):
+        if any(abs(width - stem) <= tolerance for stem in stems):
+            continue
+        stems.append(width)
+        if len(stems) == count:
+            break
+    return stems
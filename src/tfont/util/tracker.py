@@ -1,9 +1,22 @@
 from collections.abc import MutableMapping, MutableSequence
-from time import time
 
 obj_setattr = object.__setattr__
 
 
+def bumpGlyph(glyph):
+    glyph._version += 1
+    font = glyph._parent
+    if font is not None:
+        font._generation += 1
+
+
+def bumpLayer(layer):
+    layer._version += 1
+    glyph = layer._parent
+    if glyph is not None:
+        bumpGlyph(glyph)
+
+
 class TrackingDict(MutableMapping):
     """
     Note: dict bears a value iterator (given that keys are just cached attrs).
@@ -146,6 +159,7 @@ class FontFeaturesDict(TrackingDict):
     def applyChange(self):
         font = self._parent
         font._layoutEngine = None
+        font._generation += 1
 
 
 class FontFeatureClassesDict(TrackingDict):
@@ -157,6 +171,7 @@ class FontFeatureClassesDict(TrackingDict):
     def applyChange(self):
         font = self._parent
         font._layoutEngine = None
+        font._generation += 1
 
 
 class FontFeatureHeadersList(TrackingList):
@@ -167,6 +182,7 @@ class FontFeatureHeadersList(TrackingList):
     def applyChange(self):
         font = self._parent
         font._layoutEngine = None
+        font._generation += 1
 
 
 class FontGlyphsList(TrackingList):
@@ -176,7 +192,8 @@ class FontGlyphsList(TrackingList):
 
     def applyChange(self):
         font = self._parent
-        font._cmap = font._layoutEngine = None
+        font._cmap = font._glyphIds = font._layoutEngine = None
+        font._generation += 1
 
 
 # Note: when adding or deleting a master, do we cycle
@@ -192,6 +209,7 @@ class FontMastersDict(TrackingDict):
         selectedMaster = font._selectedMaster
         if selectedMaster is not None and selectedMaster not in font._masters:
             font._selectedMaster = None
+        font._generation += 1
 
 
 class FontInstancesList(TrackingList):
@@ -209,7 +227,7 @@ class GlyphLayersList(TrackingList):
 
     def applyChange(self):
         glyph = self._parent
-        glyph._lastModified = time()
+        bumpGlyph(glyph)
 
 # Layer
 
@@ -223,10 +241,7 @@ class LayerAnchorsDict(TrackingDict):
     def applyChange(self):
         layer = self._parent
         layer._bounds = None
-        glyph = layer._parent
-        if glyph is None:
-            return
-        glyph._lastModified = time()
+        bumpLayer(layer)
 
     def __delitem__(self, key):
         dict_ = self._dict
@@ -322,10 +337,7 @@ class LayerComponentsList(TrackingList):
     def applyChange(self):
         layer = self._parent
         layer._bounds = None
-        glyph = layer._parent
-        if glyph is None:
-            return
-        glyph._lastModified = time()
+        bumpLayer(layer)
 
     __delitem__ = _Layer_selectible_delitem
 
@@ -342,10 +354,7 @@ class LayerGuidelinesList(TrackingList):
     def applyChange(self):
         layer = self._parent
         layer._bounds = None
-        glyph = layer._parent
-        if glyph is None:
-            return
-        glyph._lastModified = time()
+        bumpLayer(layer)
 
     __delitem__ = _Layer_selectible_delitem
 
@@ -361,12 +370,8 @@ class LayerPathsList(TrackingList):
 
     def applyChange(self):
         layer = self._parent
-        layer._bounds = layer._closedGraphicsPath = layer._openGraphicsPath = \
-            None
-        glyph = layer._parent
-        if glyph is None:
-            return
-        glyph._lastModified = time()
+        layer._bounds = None
+        bumpLayer(layer)
 
     def __delitem__(self, key):
         list_ = self._list
@@ -409,6 +414,16 @@ class MasterGuidelinesList(TrackingList):
 # Path
 
 
+def _checkPlainPoints(values):
+    # before the list is touched, so that a failed insertion changes nothing
+    from tfont.util.pointArray import PointProxy
+    for value in values:
+        if value.__class__ is PointProxy:
+            raise TypeError(
+                "compact points can only be moved between compact paths, "
+                "copy() them first")
+
+
 class PathPointsList(TrackingList):
     __slots__ = ()
 
@@ -416,19 +431,22 @@ class PathPointsList(TrackingList):
 
     def applyChange(self):
         path = self._parent
-        path._bounds = path._graphicsPath = None
+        path._bounds = path._flattened = path._graphicsPath = \
+            path._segments = None
+        path._version += 1
         layer = path._parent
         if layer is None:
             return
-        layer._bounds = layer._closedGraphicsPath = layer._openGraphicsPath = \
-            None
-        glyph = layer._parent
-        if glyph is None:
-            return
-        glyph._lastModified = time()
+        layer._bounds = None
+        bumpLayer(layer)
 
     def __delitem__(self, key):
         list_ = self._list
+        if list_.__class__ is not list:
+            # compact storage keeps parent links and selection itself
+            del list_[key]
+            self.applyChange()
+            return
         value = list_[key]
         del list_[key]
         layer = self._parent._parent
@@ -446,7 +464,17 @@ class PathPointsList(TrackingList):
         self.applyChange()
 
     def __setitem__(self, key, value):
-        self._list[key] = value
+        list_ = self._list
+        if list_.__class__ is list:
+            if key.__class__ is slice:
+                value = list(value)
+                _checkPlainPoints(value)
+            else:
+                _checkPlainPoints((value,))
+        list_[key] = value
+        if list_.__class__ is not list:
+            self.applyChange()
+            return
         parent = self._parent
         layer = parent._parent
         if key.__class__ is slice:
@@ -463,7 +491,13 @@ class PathPointsList(TrackingList):
         self.applyChange()
 
     def insert(self, index, value):
-        self._list.insert(index, value)
+        list_ = self._list
+        if list_.__class__ is list:
+            _checkPlainPoints((value,))
+        list_.insert(index, value)
+        if list_.__class__ is not list:
+            self.applyChange()
+            return
         value._parent = parent = self._parent
         if value.selected:
             layer = parent._parent
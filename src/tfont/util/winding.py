@@ -0,0 +1,104 @@
+from tfont.util.bezierMath import qcurveCubics
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# flattening tolerance of winding queries, in units
+WINDING_TOLERANCE = .1
+
+
+def _curveArea(x0, y0, x1, y1, x2, y2, x3, y3):
+    # signed area under a cubic, as pathArea() sums it
+    area = (x3 - x0) * (y3 + y0) * -.5
+    x1, y1 = x1 - x0, y1 - y0
+    x2, y2 = x2 - x0, y2 - y0
+    x3, y3 = x3 - x0, y3 - y0
+    return area - (
+        x1 * (-y2 - y3) + x2 * (y1 - 2 * y3) + x3 * (y1 + 2 * y2)) * .15
+
+
+def pathArea(path):
+    """
+    Returns the signed area of a closed path, positive if it runs
+    counter-clockwise, computed analytically like fontTools' AreaPen.
+    Open paths have no area, 0 is returned.
+    """
+    if path.open:
+        return 0
+    area = 0
+    for segment in path.segments:
+        coords = segment.coordinates
+        coords_len = len(coords)
+        if coords_len > 4:
+            type_ = segment.type
+            if type_ == "curve" and coords_len == 8:
+                area += _curveArea(*coords)
+                continue
+            elif type_ == "qcurve":
+                for cubic in qcurveCubics(coords):
+                    area += _curveArea(*cubic)
+                continue
+            elif type_ != "line":
+                raise NotImplementedError(
+                    "cannot compute area for %r segment" % type_)
+            # off-curves before a line point are ignored
+        x0, y0, x1, y1 = coords[0], coords[1], coords[-2], coords[-1]
+        area -= (x1 - x0) * (y1 + y0) * .5
+    return area
+
+
+def polylinesWindings(polylines, points):
+    """
+    Returns the winding number of each x, y in *points* with respect to
+    closed polylines, given as flat buffers of x, y values. Counter-clockwise
+    polylines wind positively.
+    """
+    polylines = [polyline for polyline in polylines if len(polyline) >= 4]
+    if np is not None and polylines and len(points) > 1:
+        edges = []
+        for polyline in polylines:
+            p = np.frombuffer(polyline, dtype=float).reshape(-1, 2)
+            edges.append(np.concatenate((p[:-1], p[1:]), axis=1))
+        edges = np.concatenate(edges)
+        x0, y0, x1, y1 = edges.T
+        pts = np.asarray(points, dtype=float).reshape(-1, 2)
+        windings = np.zeros(len(pts), dtype=int)
+        # bound the (points, edges) temporaries
+        step = max(1, 2 ** 20 // max(1, len(edges)))
+        for start in range(0, len(pts), step):
+            x = pts[start:start+step, 0, None]
+            y = pts[start:start+step, 1, None]
+            isLeft = (x1 - x0) * (y - y0) - (x - x0) * (y1 - y0)
+            up = (y0 <= y) & (y < y1) & (isLeft > 0)
+            down = (y1 <= y) & (y < y0) & (isLeft < 0)
+            windings[start:start+step] = up.sum(axis=1) - down.sum(axis=1)
+        return windings.tolist()
+    windings = []
+    for x, y in points:
+        winding = 0
+        for polyline in polylines:
+            winding += polylineWinding(polyline, x, y)
+        windings.append(winding)
+    return windings
+
+
+def polylineWinding(polyline, x, y):
+    """
+    Returns the winding number of x, y with respect to a closed polyline,
+    given as a flat buffer of x, y values.
+    """
+    winding = 0
+    if len(polyline) < 4:
+        return winding
+    x0, y0 = polyline[0], polyline[1]
+    for i in range(2, len(polyline), 2):
+        x1, y1 = polyline[i], polyline[i+1]
+        if y0 <= y:
+            if y1 > y and (x1 - x0) * (y - y0) - (x - x0) * (y1 - y0) > 0:
+                winding += 1
+        elif y1 <= y and (x1 - x0) * (y - y0) - (x - x0) * (y1 - y0) < 0:
+            winding -= 1
+        x0, y0 = x1, y1
+    return winding
@@ -1,7 +1,927 @@
+import math
+import os
 import pytest
 
 
 def test_import_tfont():
     import tfont
     assert hasattr(tfont, "Font")
-    assert hasattr(tfont, "TFontConverter")
\ No newline at end of file
+    assert hasattr(tfont, "TFontConverter")
+
+
+def test_versions():
+    from tfont.objects import Font, Glyph, Path, Point
+    font = Font()
+    glyph = Glyph("a")
+    font.glyphs.append(glyph)
+    layer = glyph.layerForMaster(None)
+    assert not font.modified
+    path = Path([Point(0, 0, "line"), Point(10, 0, "line")])
+    layer.paths.append(path)
+    versions = path.version, layer.version, glyph.version, font.generation
+    path._points[0].x = 5
+    assert path.version > versions[0]
+    assert layer.version > versions[1]
+    assert glyph.version > versions[2]
+    assert font.generation > versions[3]
+    # selection isn't a data change
+    version = glyph.version
+    path._points[0].selected = True
+    assert glyph.version == version
+    assert glyph.lastModified is not None
+    assert font.modified
+
+
+def test_compact_path():
+    from tfont.objects import Font, Glyph, Path, Point
+    font = Font()
+    glyph = Glyph("a")
+    font.glyphs.append(glyph)
+    layer = glyph.layerForMaster(None)
+    path = Path([
+        Point(0, 0, "line"), Point(10, 0), Point(20, 10),
+        Point(30, 30, "curve", smooth=True)])
+    layer.paths.append(path)
+    path._points[3].selected = True
+    version = layer._version
+    path.compact()
+    assert path.compacted
+    assert layer._version > version
+    points = path.points
+    point = points[3]
+    assert point is points[-1]
+    assert (point.x, point.y, point.type, point.smooth) == (
+        30, 30, "curve", True)
+    assert layer.selection == {point}
+    assert path.bounds == (0, 0, 30, 30)
+    point.x = 40
+    assert path.bounds == (0, 0, 40, 30)
+    path.reverse()
+    assert points[-1] is point and points[2].type == "curve"
+    popped = points.pop()
+    assert not layer.selection and popped.x == 40
+    points.insert(0, popped)
+    assert points[0] is popped and layer.selection == {popped}
+    # compact points can't go into a plain path, which is left unchanged
+    plain = Path([Point(0, 0, "line")])
+    layer.paths.append(plain)
+    with pytest.raises(TypeError):
+        plain.points.append(points[1])
+    with pytest.raises(TypeError):
+        plain.points[0:1] = [points[1]]
+    assert len(plain.points) == 1 and points[1].path is path
+    assert plain.points[0].x == 0
+    # held proxies keep their index current, without searching for it
+    held = list(points)
+    points.insert(0, Point(5, 5, "line"))
+    del points[2]
+    points.reverse()
+    ids = path._points._ids
+    assert all(ids[p._index] == p._key for p in held if p._array is not None)
+
+
+def test_coordinates():
+    from tfont.objects import Layer, Path, Point
+    layer = Layer()
+    layer.paths.append(Path([Point(0, 0, "line"), Point(10, 20, "line")]))
+    layer.paths.append(Path([Point(5, 5, "line")]))
+    layer._paths[1].compact()
+    coords = layer.coordinates()
+    assert coords.tolist() == [[0, 0], [10, 20], [5, 5]]
+    layer.setCoordinates([(x + 1, y * 2) for x, y in coords.tolist()])
+    assert layer._paths[0].coordinates().tolist() == [[1, 0], [11, 40]]
+    assert layer.bounds == (1, 0, 11, 40)
+
+
+def test_transform_selection():
+    from tfont.objects import Layer, Path, Point, Transformation
+    layer = Layer()
+    layer.paths.append(Path([Point(0, 0, "line"), Point(10, 0, "line")]))
+    layer.paths.append(Path([Point(0, 10, "line")]))
+    layer._paths[1].compact()
+    layer._paths[0]._points[1].selected = True
+    layer.transform(Transformation(xOffset=5), selectionOnly=True)
+    assert layer.coordinates().tolist() == [[0, 0], [15, 0], [0, 10]]
+    layer.transform(Transformation(2, 0, 0, 2, 0, 1))
+    assert layer.coordinates().tolist() == [[0, 1], [30, 1], [0, 21]]
+    assert layer.selectionBounds == (30, 1, 30, 1)
+
+
+def test_scale_units_per_em():
+    from tfont.objects import (
+        Anchor, Font, Glyph, Layer, Path, Point)
+    font = Font()
+    glyph = Glyph("a")
+    font.glyphs.append(glyph)
+    layer = Layer(masterName=font.selectedMaster.name, width=500)
+    glyph.layers.append(layer)
+    layer.paths.append(Path([Point(0, 0, "line"), Point(101, 33, "line")]))
+    layer.anchors["top"] = Anchor(x=250, y=700)
+    assert layer.bounds == (0, 0, 101, 33)
+    master = font.selectedMaster
+    master.hKerning["a"] = {"a": -15}
+    generation = font.generation
+    font.scaleUnitsPerEm(2000)
+    assert font.unitsPerEm == 2000
+    assert layer.coordinates().tolist() == [[0, 0], [202, 66]]
+    assert layer.bounds == (0, 0, 202, 66)
+    assert layer.width == 1000 and layer.anchors["top"].y == 1400
+    assert master.ascender == 1600 and master.hKerning["a"]["a"] == -30
+    assert master.kerningTable().getPair("a", "a") == -30
+    glyph.unicodes = ["0061"]
+    assert font.shape("aa")[1] == (970, 1000)
+    assert font.generation > generation
+
+
+def test_cached_segments():
+    from tfont.objects import Path, Point
+    path = Path([
+        Point(0, 0, "line"), Point(100, 0, "line"), Point(100, 100, "line")])
+    segments = path.segments
+    assert path.segments is segments and len(segments) == 3
+    path._points[0].x = 10
+    assert path.segments is segments
+    segments.splitSegment(1, .5)
+    assert path.segments is segments and len(segments) == 4
+    assert path.bounds == (10, 0, 100, 100)
+    path._points[1].type = None
+    assert path.segments is not segments and len(path.segments) == 3
+    path.compact()
+    segments = path.segments
+    path.points.append(Point(0, 100, "line"))
+    assert len(path.segments) == 4
+
+
+def test_segment_coordinates():
+    from tfont.objects import Path, Point
+    path = Path([
+        Point(0, 0, "line"), Point(0, 50), Point(50, 100),
+        Point(100, 100, "curve")])
+    for compact in (False, True):
+        if compact:
+            path.compact()
+        segments = path.segments
+        assert segments[0].coordinates == (100, 100, 0, 0)
+        assert segments[1].coordinates == (0, 0, 0, 50, 50, 100, 100, 100)
+        assert segments[0].bounds == (0, 0, 100, 100)
+        (x, y, t), = segments[1].intersectLine(50, -10, 50, 200)
+        assert round(x) == 50 and round(y) == 84
+        assert segments[1].projectPoint(0, 100) == (31.25, 68.75, .5)
+
+
+def test_batched_bounds():
+    from tfont.objects import Layer, Path, Point
+    from tfont.util.bounds import layersBounds
+    layers = []
+    for offset in range(12):
+        layer = Layer()
+        layer.paths.append(Path([
+            Point(offset, 0, "line"), Point(offset, 100),
+            Point(offset + 100, 100), Point(offset + 100, 0, "curve")]))
+        layers.append(layer)
+    # extrema must not replace the endpoints
+    assert layers[0]._paths[0].segments[1].bounds == (0, 0, 100, 75)
+    bounds = layersBounds(layers)
+    assert bounds[0] == (0, 0, 100, 75) and bounds[11] == (11, 0, 111, 75)
+    assert layers[11]._paths[0]._bounds == (11, 0, 111, 75)
+
+
+def test_nearest_segment():
+    from tfont.objects import Layer, Path, Point
+    layer = Layer()
+    layer.paths.append(Path([
+        Point(0, 0, "line"), Point(0, 50), Point(50, 100),
+        Point(100, 100, "curve")]))
+    layer.paths.append(Path([Point(200, 0, "move"), Point(200, 100, "line")]))
+    segment, x, y, t = layer.nearestSegment(190, 40)
+    assert segment is layer._paths[1].segments[1]
+    assert (x, y, t) == (200, 40, .4)
+    segment, x, y, t = layer.nearestSegment(0, 100)
+    assert segment is layer._paths[0].segments[1]
+    assert (round(x, 6), round(y, 6), round(t, 6)) == (31.25, 68.75, .5)
+    assert layer.nearestSegment(500, 500, maxDistance=10) is None
+
+
+def test_spatial_index():
+    from tfont.objects import Anchor, Layer, Path, Point
+    layer = Layer()
+    for i in range(50):
+        path = Path([
+            Point(i * 10, 0, "line"), Point(i * 10 + 5, 0, "line"),
+            Point(i * 10 + 5, 5, "line")])
+        if i % 2:
+            path.compact()
+        layer.paths.append(path)
+    layer.anchors["top"] = Anchor(x=250, y=100)
+    points = layer.pointsInRect((98, -1, 112, 1))
+    assert sorted((p.x, p.y) for p in points) == [
+        (100, 0), (105, 0), (110, 0)]
+    assert layer.nearestPoint(251, 99, 5) is layer.anchors["top"]
+    assert layer.nearestPoint(251, 90, 5) is None
+    point = layer.nearestPoint(116, 1, 2)
+    assert point is layer.paths[11].points[1]
+    segment, = layer.segmentsNear(106, 2, 1.5)
+    assert segment is layer.paths[10].segments[2]
+    index = layer.spatialIndex
+    assert layer.spatialIndex is index
+    point.x = 400
+    assert layer.spatialIndex is not index
+    assert layer.nearestPoint(116, 1, 2) is None
+    assert layer.nearestPoint(106, 1, 2) is layer.paths[10].points[1]
+    layer.paths[10].compact()
+    assert layer.nearestPoint(106, 1, 2) is layer.paths[10].points[1]
+    # long diagonals are filed only in the cells they cross
+    layer = Layer()
+    for i in range(100):
+        layer.paths.append(Path([Point(i * 10, i * 10, "move")]))
+    layer.paths.append(Path([
+        Point(0, 0, "move"), Point(990, 990, "line"),
+        Point(990, 660, None), Point(660, 0, None), Point(0, 0, "curve")]))
+    index = layer.spatialIndex
+    diagonal, curve = layer.paths[-1].segments[1:]
+    cells = [
+        key for key, items in index._segmentCells.items()
+        if any(item[0] == diagonal for item in items)]
+    assert len(cells) < 3 * 990 / index._cellSize
+    assert layer.segmentsNear(500, 501, 1) == [diagonal]
+    assert not layer.segmentsNear(700, 300, 10)
+    x, y = .125 * 990 + .375 * 990 + .375 * 660, .125 * 990 + .375 * 660
+    assert layer.segmentsNear(x + .5, y, 1) == [curve]
+
+
+def test_select_in_rect():
+    from tfont.objects import Anchor, Layer, Path, Point
+    layer = Layer()
+    layer.paths.append(Path([Point(0, 0, "line"), Point(10, 10, "line")]))
+    layer.paths.append(Path([Point(20, 0, "line"), Point(30, 10, "line")]))
+    layer._paths[1].compact()
+    layer.anchors["top"] = Anchor(x=40, y=40)
+    layer.selectInRect((-1, -1, 21, 1))
+    assert layer.selectionBounds == (0, 0, 20, 0)
+    assert len(layer.selection) == 2 and layer._paths[1].points[0].selected
+    layer.selectInRect((35, 35, 45, 45), mode="add")
+    assert layer.selectionBounds == (0, 0, 40, 40)
+    assert layer.anchors["top"].selected
+    layer.selectInRect((-1, -1, 1, 1), mode="toggle")
+    assert not layer._paths[0]._points[0].selected
+    assert layer.selectionBounds == (20, 0, 40, 40)
+    layer.selectInRect((25, 5, 35, 15))
+    assert layer.selection == {layer._paths[1].points[1]}
+    assert layer.selectionBounds == (30, 10, 30, 10)
+    assert not layer.anchors["top"].selected
+
+
+def test_intersect_line_prefilter():
+    from tfont.objects import Layer, Path, Point
+    from tfont.util.bezierMath import lineIntersectsRect
+    assert lineIntersectsRect(0, 0, 10, 10, 4, 4, 6, 6)
+    assert not lineIntersectsRect(0, 0, 10, 10, 6, 0, 10, 3)
+    assert not lineIntersectsRect(0, 0, 10, 10, 20, 20, 30, 30)
+    layer = Layer()
+    for offset in (0, 1000):
+        layer.paths.append(Path([
+            Point(offset, 0, "line"), Point(offset + 100, 0, "line"),
+            Point(offset + 100, 100, "line"), Point(offset, 100, "line")]))
+    assert layer.intersectLine(-10, 50, 110, 50) == [
+        (-10, 50), (0, 50), (100, 50), (110, 50)]
+    layer.sliceLine(50, -10, 50, 110)
+    assert len(layer.paths) == 3
+    assert sorted(path.bounds for path in layer.paths) == [
+        (0, 0, 50, 100), (50, 0, 100, 100), (1000, 0, 1100, 100)]
+
+
+def test_stems():
+    from tfont.objects import Component, Font, Glyph, Layer, Path, Point
+    from tfont.util.stems import measureStems, scanRuns, suggestStems
+    font = Font()
+    master = font.selectedMaster
+    for name, stem in (("l", 80), ("i", 80), ("bar", 82)):
+        glyph = Glyph(name)
+        font.glyphs.append(glyph)
+        layer = Layer(masterName=master.name, width=200)
+        glyph.layers.append(layer)
+        # a vertical stem, with a round top
+        layer.paths.append(Path([
+            Point(50, 0, "line"), Point(50 + stem, 0, "line"),
+            Point(50 + stem, 600, "line"), Point(50 + stem, 700),
+            Point(50, 700), Point(50, 600, "curve")]))
+    runs, = scanRuns([font.glyphs[0].layers[0]], (250, 650, 1000))
+    assert runs[0] == [(50, 130)] and runs[2] == []
+    (start, end), = runs[1]
+    assert 50 < start < end < 130 and start + end == 180
+    # a scan line through vertices: passing through counts once, extrema
+    # twice or not at all
+    layer = Layer()
+    layer.paths.append(Path([
+        Point(0, 0, "line"), Point(100, 0, "line"), Point(120, 50, "line"),
+        Point(100, 100, "line"), Point(50, 50, "line"),
+        Point(0, 100, "line")]))
+    layer.paths.append(Path([
+        Point(278, 0), Point(300, 22), Point(300, 50, "curve"),
+        Point(300, 78), Point(278, 100), Point(250, 100, "curve"),
+        Point(222, 100), Point(200, 78), Point(200, 50, "curve"),
+        Point(200, 22), Point(222, 0), Point(250, 0, "curve")]))
+    runs, = scanRuns([layer], (0, 50, 100))
+    assert runs == [
+        [(0, 100), (250, 250)], [(0, 50), (50, 120), (200, 300)], []]
+    # components are decomposed
+    glyph = Glyph("l.alt")
+    font.glyphs.append(glyph)
+    layer = Layer(masterName=master.name, width=200)
+    glyph.layers.append(layer)
+    layer.components.append(Component("l"))
+    runs, = scanRuns([layer], (250,))
+    assert runs == [[(50, 130)]]
+    hStems, vStems = measureStems(font)
+    assert vStems == {80: 3, 82: 1}
+    assert suggestStems(vStems, count=1) == [80]
+    assert sum(hStems.values()) == 4
+
+
+def test_flatten():
+    from tfont.objects import Layer, Path, Point
+    layer = Layer()
+    path = Path([
+        Point(0, 0, "line"), Point(0, 50), Point(50, 100),
+        Point(100, 100, "curve")])
+    layer.paths.append(path)
+    coarse = path.flatten(10)
+    fine = path.flatten(.1)
+    assert coarse[:2].tolist() == [100, 100] and coarse[-2:] == coarse[:2]
+    assert len(fine) > len(coarse) > 6
+    assert layer.flatten(10)[0] is coarse
+    for tolerance in (1, 2, 3, 4):
+        path.flatten(tolerance)
+    assert path.flatten(10) is not coarse
+    coords = path.flatten(4)
+    path._points[0].x = 10
+    assert path.flatten(4) is not coords
+    # quadratics, split at the on-curve implied between off-curves
+    path = Path([
+        Point(0, 0, "line"), Point(0, 100), Point(100, 100),
+        Point(100, 0, "qcurve")])
+    layer.paths.append(path)
+    coords = path.flatten(.1)
+    pairs = list(zip(coords[::2], coords[1::2]))
+    assert (50, 100) in pairs and len(pairs) > 6
+    assert max(coords[1::2]) == 100
+    # (12.5, 75) is halfway along the first quadratic
+    distances = []
+    for (x0, y0), (x1, y1) in zip(pairs, pairs[1:]):
+        dx, dy = x1 - x0, y1 - y0
+        t = ((12.5 - x0) * dx + (75 - y0) * dy) / (dx * dx + dy * dy)
+        t = min(max(t, 0), 1)
+        distances.append(math.hypot(x0 + t * dx - 12.5, y0 + t * dy - 75))
+    assert min(distances) <= .1
+    assert path.bounds == (0, 0, 100, 100)
+    assert path.segments[-1].bounds == (0, 0, 100, 100)
+
+
+def test_point_type_change():
+    from tfont.objects import Layer, Path, Point
+    for compact in (False, True):
+        layer = Layer()
+        path = Path([
+            Point(0, 0, "line"), Point(-50, 50), Point(50, 150),
+            Point(100, 100, "curve")])
+        if compact:
+            path.compact()
+        layer.paths.append(path)
+        curve = path.flatten(1)
+        bounds = layer.bounds
+        path.points[3].type = "line"
+        assert len(path.flatten(1)) < len(curve)
+        assert layer.bounds != bounds and path.bounds == layer.bounds
+
+
+def test_winding():
+    from tfont.objects import (
+        Component, Font, Glyph, Layer, Path, Point, Transformation)
+    square = Path([
+        Point(0, 0, "line"), Point(100, 0, "line"), Point(100, 100, "line"),
+        Point(0, 100, "line")])
+    assert square.area == 10000 and not square.clockwise
+    round_ = Path([
+        Point(0, 0, "line"), Point(100, 0, "line"), Point(100, 55),
+        Point(55, 100), Point(0, 100, "curve")])
+    assert round_.area == 7846.25
+    assert square.winding(50, 50) == 1 and square.winding(150, 50) == 0
+    square.reverse()
+    assert square.clockwise and square.winding(50, 50) == -1
+    font = Font()
+    master = font.selectedMaster
+    for name in ("a", "b"):
+        glyph = Glyph(name)
+        font.glyphs.append(glyph)
+        glyph.layers.append(Layer(masterName=master.name))
+    a = font.glyphs[0].layers[0]
+    a.paths.append(round_)
+    b = font.glyphs[1].layers[0]
+    b.components.append(Component("a", Transformation(
+        xScale=-1, xOffset=300)))
+    assert a.contains(90, 90) is False and a.contains(10, 90) is True
+    assert b.containsPoints([(290, 90), (210, 90), (50, 50)]) == [
+        True, False, False]
+    # quadratics, with an implied on-curve at (75, 75)
+    quad = Path([
+        Point(0, 0, "line"), Point(100, 0, "line"), Point(100, 50),
+        Point(50, 100), Point(0, 100, "qcurve")])
+    assert quad.area == pytest.approx(25000 / 3) and not quad.clockwise
+    a.paths.clear()
+    a.paths.append(quad)
+    assert a.containsPoints([(70, 70), (80, 80)]) == [True, False]
+    quad.reverse()
+    assert quad.clockwise
+
+
+def test_graphics_path_cache():
+    import gc
+    import weakref
+    from tfont.objects import Font, Glyph, Layer, Path, Point
+    from tfont.util.cache import LRUCache
+    font = Font()
+    font.graphicsPathCache = cache = LRUCache(2)
+    layers = []
+    for name in ("a", "b", "c"):
+        glyph = Glyph(name)
+        font.glyphs.append(glyph)
+        layer = Layer(masterName=font.selectedMaster.name)
+        glyph.layers.append(layer)
+        layer.paths.append(Path([Point(0, 0, "line"), Point(10, 0, "line")]))
+        layers.append(layer)
+    calls = []
+    Layer.closedGraphicsPathFactory = lambda self: calls.append(self) or [
+        len(calls)]
+    try:
+        first = layers[0].closedGraphicsPath
+        assert layers[0].closedGraphicsPath is first
+        assert (cache.hits, cache.misses) == (1, 1)
+        layers[0]._paths[0]._points[1].x = 20
+        assert layers[0].closedGraphicsPath is not first
+        layers[1].closedGraphicsPath
+        layers[2].closedGraphicsPath
+        assert len(cache) == 2 and cache.evictions == 1
+        assert (id(layers[0]), "closed") not in cache
+        # entries don't keep layers alive
+        layer = weakref.ref(layers.pop())
+        del font.glyphs[-1], glyph, calls[:]
+        gc.collect()
+        assert layer() is None and len(cache) == 2
+    finally:
+        del Layer.closedGraphicsPathFactory
+
+
+def test_raster(tmp_path):
+    from tfont.objects import Layer, Path, Point
+    from tfont.util.raster import rasterize, renderLayer, renderLayers
+    image = rasterize([[2, 2, 8, 2, 8, 8, 2, 8]], 10, 10)
+    assert image[5 * 10 + 5] == 255 and image[0] == image[9 * 10 + 9] == 0
+    assert image[2 * 10 + 1] == 0 and image[2 * 10 + 2] == 255
+    layer = Layer(width=100)
+    layer.paths.append(Path([
+        Point(0, 0, "line"), Point(100, 0, "line"), Point(100, 50, "line"),
+        Point(0, 50, "line")]))
+    image = renderLayer(layer, 10, 10, box=(0, 0, 100, 100))
+    assert image[9 * 10 + 5] == 255 and image[0] == 0
+    first = renderLayers([layer], 10, 10, cacheDir=str(tmp_path))
+    assert len(list(tmp_path.glob("*/*.gray"))) == 1
+    assert renderLayers([layer], 10, 10, cacheDir=str(tmp_path)) == first
+
+
+def test_decompose_components():
+    from tfont.objects import (
+        Component, Font, Glyph, Layer, Path, Point, Transformation)
+    font = Font()
+    master = font.selectedMaster
+    layers = {}
+    for name in ("acute", "a", "aacute", "b"):
+        glyph = Glyph(name)
+        font.glyphs.append(glyph)
+        glyph.layers.append(Layer(masterName=master.name))
+        layers[name] = glyph.layers[0]
+    layers["acute"].paths.append(Path([
+        Point(0, 0, "line"), Point(10, 0, "line"), Point(10, 10, "curve"),
+        Point(0, 10, "line", smooth=True)]))
+    layers["a"].paths.append(Path([
+        Point(0, 0, "line"), Point(50, 0, "line"), Point(50, 50, "line")]))
+    layers["aacute"].components.extend([
+        Component("a"), Component("acute", Transformation(yOffset=100))])
+    # nested, and shares the transformed acute
+    layers["b"].components.append(Component("aacute", Transformation(
+        xScale=2, xOffset=5)))
+    cache = font.outlineCache
+    layers["b"].decomposeComponents()
+    assert not layers["b"].components and len(layers["b"].paths) == 2
+    points = layers["b"].paths[1].points
+    assert (points[2].x, points[2].y, points[2].type) == (25, 110, "curve")
+    assert points[3].smooth and layers["aacute"].components
+    misses = cache.misses
+    font.decomposeComponents()
+    assert cache.misses == misses and cache.hits
+    assert [(p.x, p.y) for p in layers["aacute"].paths[1].points] == [
+        (0, 100), (10, 100), (10, 110), (0, 110)]
+    # edits to a base invalidate the outlines resolved through it
+    layers["aacute"].paths[1].points[0].x = -10
+    layers["b"].components.append(Component("aacute"))
+    layers["b"].components[0].decompose()
+    assert layers["b"].paths[-1].points[0].x == -10
+    # a base replaced under the same name isn't mistaken for the old one
+    layers["b"].components.append(Component("acute"))
+    layers["b"].components[-1].decompose()
+    assert layers["b"].paths[-1].points[1].x == 10
+    del font.glyphs[0]
+    acute = Glyph("acute")
+    font.glyphs.append(acute)
+    acute.layers.append(Layer(masterName=master.name))
+    acute.layers[0].paths.append(Path([
+        Point(0, 0, "line"), Point(20, 0, "line"), Point(20, 20, "line")]))
+    component = Component("acute")
+    layers["b"].components.append(component)
+    component.decompose()
+    assert layers["b"].paths[-1].points[1].x == 20
+    # cycles are skipped
+    layers["a"].components.append(Component("b"))
+    layers["b"].components.append(Component("a"))
+    count = len(layers["b"].paths)
+    layers["b"].components[-1].decompose()
+    assert len(layers["b"].paths) == count + 1
+
+
+def test_draw():
+    from fontTools.pens.pointPen import PointToSegmentPen
+    from fontTools.pens.recordingPen import RecordingPen, RecordingPointPen
+    from tfont.objects import (
+        Component, Font, Glyph, Layer, Path, Point, Transformation)
+    paths = [
+        Path([
+            Point(0, 0, "line"), Point(100, 0, "line"), Point(100, 55),
+            Point(55, 100), Point(0, 100, "curve", smooth=True)]),
+        Path([
+            Point(50, 0), Point(50, 50, "qcurve"), Point(0, 50, "line"),
+            Point(0, 0, "line")]),
+        Path([Point(0, 0, "move"), Point(10, 0, "line"), Point(20, 5),
+              Point(30, 5), Point(40, 0, "curve")]),
+        Path([Point(0, 0), Point(10, 0), Point(10, 10)]),
+        Path([Point(0, 0, "line"), Point(0, 0, "line")]),
+    ]
+    paths[0].compact()
+    for path in paths:
+        pen, pointPen = RecordingPen(), RecordingPointPen()
+        path.draw(pen)
+        path.drawPoints(pointPen)
+        expected = RecordingPen()
+        pointPen.replay(PointToSegmentPen(expected))
+        assert pen.value == expected.value
+    font = Font()
+    for name in ("a", "b"):
+        glyph = Glyph(name)
+        font.glyphs.append(glyph)
+        glyph.layers.append(Layer(masterName=font.selectedMaster.name))
+    a, b = (glyph.layers[0] for glyph in font.glyphs)
+    a.paths.append(paths[0])
+    b.components.append(Component("a", Transformation(xOffset=10)))
+    pen = RecordingPen()
+    b.draw(pen)
+    assert pen.value == [("addComponent", ("a", (1, 0, 0, 1, 10, 0)))]
+    pen = RecordingPen()
+    b.draw(pen, decompose=True)
+    assert pen.value[0] == ("moveTo", ((10, 0),))
+    assert pen.value[-2] == ("curveTo", ((110, 55), (65, 100), (10, 100)))
+    misses = font.outlineCache.misses
+    b.draw(RecordingPen(), decompose=True)
+    assert font.outlineCache.misses == misses
+
+
+def test_layer_pens():
+    from fontTools.pens.recordingPen import RecordingPointPen
+    from tfont.objects import Layer, Path, Point
+    source = Layer()
+    source.paths.append(Path([
+        Point(0, 0, "line"), Point(100, 0, "line"), Point(100, 55),
+        Point(55, 100), Point(0, 100, "curve", smooth=True)]))
+    recording = RecordingPointPen()
+    source.drawPoints(recording)
+    recording.addComponent("a", (1, 0, 0, 1, 10, 20))
+    layer = Layer()
+    with layer.getPointPen() as pointPen:
+        layer.drawPoints(pointPen)
+    assert layer.version == 0
+    # the layer is notified once for the paths and once for the components
+    pointPen = layer.getPointPen()
+    recording.replay(pointPen)
+    assert not layer.paths and layer.version == 0
+    pointPen.close()
+    assert layer.version == 2
+    check = RecordingPointPen()
+    layer.drawPoints(check)
+    assert check.value == recording.value
+    path = layer.paths[0]
+    assert path._parent is layer and path.points[2]._parent is path
+    assert path.bounds == (0, 0, 100, 100)
+    # segment pen, closed contour starting off-curve is rotated
+    with layer.getPen() as pen:
+        pen.moveTo((0, 0))
+        pen.qCurveTo((50, -10), (100, 0))
+        pen.closePath()
+    with layer.getPointPen() as pointPen:
+        pointPen.beginPath(identifier="p")
+        pointPen.addPoint((100, 0), "qcurve", name="b")
+        pointPen.addPoint((0, 0), "line")
+        pointPen.addPoint((50, -10))
+        pointPen.endPath()
+    assert [point.type for point in layer.paths[2].points] == [
+        None, "qcurve", "line"]
+    assert layer.paths[2].id == "p"
+    assert layer.paths[2].points[1].extraData == {"name": "b"}
+
+
+def test_otf_converter(tmp_path, caplog):
+    from fontTools.pens.recordingPen import RecordingPen
+    from fontTools.ttLib import TTFont
+    from tfont.converters import OTFConverter
+    from tfont.objects import (
+        Component, Font, Glyph, Layer, Path, Point, Transformation)
+    font = Font()
+    master = font.selectedMaster
+    for name, unicode in (("a", "0061"), ("b", "0062"), ("c", "0063")):
+        glyph = Glyph(name, unicodes=[unicode])
+        font.glyphs.append(glyph)
+        glyph.layers.append(Layer(masterName=master.name, width=500))
+    a, b, c = (glyph.layers[0] for glyph in font.glyphs)
+    a.paths.append(Path([
+        Point(0, 0, "line"), Point(100, 0, "line"), Point(100, 55),
+        Point(55, 100), Point(0, 100, "curve")]))
+    b.components.append(Component("a", Transformation(xOffset=50)))
+    c.paths.append(Path([
+        Point(10, 0, "line"), Point(20, 0, "line"), Point(20, 10, "line")]))
+    for ttf in (True, False):
+        converter = OTFConverter(ttf=ttf)
+        tt = converter.compile(font)
+        assert converter.compiled == ["a", "b", "c"]
+        assert tt.getGlyphOrder() == [".notdef", "a", "b", "c"]
+        assert tt.getBestCmap()[0x62] == "b"
+        assert tt["hmtx"]["b"] == (500, 50) and tt["hmtx"]["c"] == (500, 10)
+        other = converter.compile(font)
+        assert converter.compiled == []
+        if ttf:
+            # fonts don't share glyph objects
+            assert other["glyf"]["a"] is not tt["glyf"]["a"]
+            converter.maxError = .5
+            converter.compile(font)
+            assert converter.compiled == ["a", "b", "c"]
+        c.paths[0].points[0].x = 0
+        path = str(tmp_path / ("font.ttf" if ttf else "font.otf"))
+        converter.save(font, path)
+        assert converter.compiled == ["c"]
+        tt = TTFont(path)
+        assert tt["hmtx"]["c"] == (500, 0)
+        pen = RecordingPen()
+        tt.getGlyphSet()["c"].draw(pen)
+        assert pen.value[0] == ("moveTo", ((0, 0),))
+        c.paths[0].points[0].x = 10
+    # components resolve through an index of glyph names
+    glyph = font.glyphs[0]
+    assert font.glyphForName("a") is glyph
+    glyph.name = "d"
+    assert font.glyphForName("a") is None and b.components[0].layer is None
+    assert font.glyphForName("d") is glyph
+    # dangling components are skipped, with a warning
+    b.components.append(Component("c"))
+    for ttf in (True, False):
+        caplog.clear()
+        path = str(tmp_path / "dangling.ttf")
+        OTFConverter(ttf=ttf).save(font, path)
+        assert "missing glyph 'a'" in caplog.text
+        pen = RecordingPen()
+        TTFont(path).getGlyphSet()["b"].draw(pen)
+        if ttf:
+            assert pen.value == [
+                ("addComponent", ("c", (1, 0, 0, 1, 0, 0)))]
+        else:
+            assert pen.value[0] == ("moveTo", ((10, 0),))
+
+
+def test_builder(tmp_path):
+    from fontTools.ttLib import TTFont
+    from tfont.builder import Builder
+    from tfont.util.features import compileFeatures
+    from tfont.objects import (
+        Feature, Font, FeatureClass, Glyph, Layer, Path, Point)
+    font = Font()
+    for name in ("a", "a.alt"):
+        glyph = Glyph(name)
+        font.glyphs.append(glyph)
+        glyph.layers.append(Layer(masterName=font.selectedMaster.name))
+        glyph.layers[0].paths.append(Path([
+            Point(0, 0, "line"), Point(100, 0, "line"),
+            Point(100, 100, "line")]))
+    font.featureClasses["alts"] = FeatureClass("alts", "a.alt")
+    font.features["salt"] = Feature("salt", "sub a by @alts;")
+    output = str(tmp_path / "font.ttf")
+    builder = Builder(font, output)
+    assert builder.update() and builder.compiled == ["a", "a.alt"]
+    gsub = TTFont(output)["GSUB"]
+    assert gsub.table.LookupList.LookupCount == 1
+    assert not builder.update()
+    font.glyphs[1].layers[0].paths[0].points[0].x = 10
+    assert builder.update() and builder.compiled == ["a.alt"]
+    assert TTFont(output)["hmtx"]["a.alt"] == (600, 10)
+    # features are only recompiled when they change, and the compiled
+    # tables aren't shared with the saved font
+    cache = font.featureCache
+    builder.build()
+    hits, misses = cache.hits, cache.misses
+    gsub = builder.build()["GSUB"]
+    assert (cache.hits, cache.misses) == (hits + 1, misses)
+    assert gsub is not compileFeatures(
+        font.featureText, [".notdef", "a", "a.alt"])["GSUB"]
+    font.features["salt"].content = "sub a.alt by a;"
+    builder.build()
+    assert cache.misses == misses + 1
+    # master and font edits are tracked
+    assert not builder.update()
+    font.selectedMaster.ascender = 900
+    assert builder.update()
+    assert TTFont(output)["hhea"].ascent == 900
+    font.selectedMaster.setKerning("a", "a.alt", -20)
+    assert builder.update() and not builder.update()
+    font.familyName = "Test"
+    assert builder.update()
+    # builds and the layout engine compile features once between them
+    misses = cache.misses
+    assert "GSUB" in font.layoutEngine.tables
+    assert cache.misses == misses
+
+
+def test_builder_file(tmp_path, capsys):
+    from fontTools.ttLib import TTFont
+    from tfont.builder import Builder, main
+    from tfont.converters import TFontConverter
+    from tfont.objects import Font, Glyph, Layer, Path, Point
+    try:
+        converter = TFontConverter()
+    except TypeError as e:
+        # cattrs releases that can't register typing generics
+        pytest.skip("TFontConverter unavailable: %s" % e)
+    font = Font()
+    for name in ("a", "b"):
+        glyph = Glyph(name)
+        font.glyphs.append(glyph)
+        glyph.layers.append(Layer(masterName=font.selectedMaster.name))
+        glyph.layers[0].paths.append(Path([
+            Point(0, 0, "line"), Point(100, 0, "line"),
+            Point(100, 100, "line")]))
+    path = str(tmp_path / "font.tfont")
+    converter.save(font, path)
+    main([path, "--once"])
+    output = str(tmp_path / "font.ttf")
+    assert capsys.readouterr().out == "built %s\n" % output
+    assert TTFont(output).getGlyphOrder() == [".notdef", "a", "b"]
+    builder = Builder(path, output)
+    assert builder.update() and builder.compiled == ["a", "b"]
+    assert not builder.update()
+    # the file is reloaded, only the glyphs that changed are recompiled
+    font.glyphs[1].layers[0].paths[0].points[0].x = 10
+    converter.save(font, path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert builder.update() and builder.compiled == ["b"]
+    assert TTFont(output)["hmtx"]["b"] == (600, 10)
+
+
+def test_layout_engine():
+    from tfont.objects import Feature, FeatureClass, Font, Glyph
+    from tfont.util.features import LayoutEngine, compileFeatures
+    font = Font()
+    for name in ("a", "b", "c"):
+        font.glyphs.append(Glyph(name))
+    font.featureClasses["ab"] = FeatureClass("ab", "a b")
+    font.features["liga"] = Feature("liga", "sub @ab c by c;")
+    assert font.featureText == (
+        "@ab = [a b];\n\nfeature liga {\nsub @ab c by c;\n} liga;")
+    engine = font.layoutEngine
+    gsub = engine.tables["GSUB"]
+    assert engine.ready and engine.error is None and "GPOS" not in \
+        engine.tables
+    assert font.layoutEngine is engine
+    # same text and glyph order, same tables
+    font.features["liga"].content = "sub a b by c;"
+    font.features["liga"].content = "sub @ab c by c;"
+    assert font.layoutEngine is not engine
+    assert font.layoutEngine.tables["GSUB"] is gsub
+    assert LayoutEngine(font, background=True).tables["GSUB"] is gsub
+    # caches aren't shared between fonts
+    other = Font()
+    other.glyphs.extend(Glyph(glyph.name) for glyph in font.glyphs)
+    other.featureClasses["ab"] = FeatureClass("ab", "a b")
+    other.features["liga"] = Feature("liga", "sub @ab c by c;")
+    assert other.layoutEngine.tables["GSUB"] is not gsub
+    other.featureCache.clear()
+    engine = LayoutEngine(other, background=True)
+    assert "GSUB" in engine.tables and engine.ready
+    font.glyphs[2].name = "d"
+    assert font.layoutEngine.error is not None
+    assert compileFeatures("", ["a"]) == {}
+
+
+def test_shape():
+    from tfont.objects import Feature, Font, Glyph, Layer
+    font = Font()
+    master = font.selectedMaster
+    for name, unicode, width in (
+            ("f", "0066", 300), ("i", "0069", 250), ("f_i", None, 500),
+            ("A", "0041", 600), ("V", "0056", 550)):
+        glyph = Glyph(name, unicodes=[unicode] if unicode else [])
+        font.glyphs.append(glyph)
+        glyph.layers.append(Layer(masterName=master.name, width=width))
+    font.features["liga"] = Feature("liga", "sub f i by f_i;")
+    master.hKerning = {"A": {"V": -80}}
+    gids, advances, offsets = font.shape("fiAV?")
+    assert gids == (2, 3, 4) and advances == (500, 520, 550)
+    assert offsets == ((0, 0),) * 3
+    assert font.shape("fiAV?", features=())[0] == (0, 1, 3, 4)
+    cache = font.shapingCache
+    font.shape("fiAV?")
+    assert cache.hits == 1
+    # glyphs of other runs don't invalidate
+    font.shape("f")
+    font.glyphs[2].layers[0].width = 510
+    assert font.shape("f")[1] == (300,) and cache.hits == 2
+    assert font.shape("fiAV?")[1] == (510, 520, 550)
+    # runs without features don't depend on the layout engine, but do on
+    # the cmap
+    font.shape("fiAV?", features=())
+    hits = cache.hits
+    font.features["liga"].content = "sub A V by f_i;"
+    assert font.shape("fiAV?")[0] == (0, 1, 2)
+    assert font.shape("fiAV?", features=())[0] == (0, 1, 3, 4)
+    assert cache.hits == hits + 1 and font._layoutEngine is not None
+    font.glyphs[4].unicodes = ["003F"]
+    assert font.shape("fiAV?", features=())[0] == (0, 1, 3, 4)
+    assert cache.hits == hits + 1
+    font.glyphs[4].unicodes = ["0056"]
+    # duplicate names resolve to the first glyph, as glyphIdForName() does
+    font.glyphs.append(Glyph("f_i"))
+    assert font.shape("AV")[0] == (2,)
+    del font.glyphs[-1]
+    # host layout engines need not provide tables
+    factory = Font.layoutEngineFactory
+    Font.layoutEngineFactory = lambda self: object()
+    try:
+        font._layoutEngine = None
+        assert font.shape("fiAV?")[0] == (0, 1, 3, 4)
+    finally:
+        Font.layoutEngineFactory = factory
+
+
+def test_kerning_table():
+    from tfont.objects import Font, Glyph, Layer
+    from tfont.util.kerning import KerningTable, kerningFor
+    table = KerningTable({"A": {"V": -80, "@O": -20}, "@T": {"o": -50.5}})
+    assert len(table) == 2 and "A" in table and "V" not in table
+    assert table.getPair("A", "V") == -80 and table.getPair("V", "A") is None
+    assert table.getPair("@T", "o") == -50.5
+    table.setPair("V", "A", -70)
+    table.removePair("A", "@O")
+    assert dict(table.pairs()) == {
+        ("A", "V"): -80, ("V", "A"): -70, ("@T", "o"): -50.5}
+    # it reads and writes as nested dicts
+    assert table.toDict() == {"A": {"V": -80}, "V": {"A": -70},
+                              "@T": {"o": -50.5}}
+    assert table["A"] == {"V": -80} and table.get("B") is None
+    table.setdefault("B", {})["C"] = 5
+    table["V"]["B"] = 10
+    del table["@T"]["o"]
+    assert table.toDict() == {"A": {"V": -80}, "B": {"C": 5},
+                              "V": {"A": -70, "B": 10}}
+    font = Font()
+    master = font.selectedMaster
+    glyphs = {}
+    for name, left, right in (
+            ("T", "T", "T"), ("Tcedilla", "T", "T"), ("o", "o", "o"),
+            ("oacute", "o", "o")):
+        glyph = Glyph(name, leftKerningGroup=left, rightKerningGroup=right)
+        font.glyphs.append(glyph)
+        glyph.layers.append(Layer(masterName=master.name, width=500))
+        glyphs[name] = glyph
+    master.hKerning = {"@T": {"@o": -60, "oacute": -30}, "T": {"o": -90}}
+    T, Tcedilla, o, oacute = (glyphs[name] for name in (
+        "T", "Tcedilla", "o", "oacute"))
+    assert kerningFor(T, o, master) == -90
+    assert kerningFor(Tcedilla, oacute, master) == -30
+    assert kerningFor(Tcedilla, o, master) == -60
+    assert kerningFor(o, T, master) == 0
+    Tcedilla.unicodes = ["0162"]
+    oacute.unicodes = ["00F3"]
+    assert font.shape("Ţó")[1] == (470, 500)
+    master.setKerning("Tcedilla", "@o", -10)
+    assert master.hKerning["Tcedilla"] == {"@o": -10}
+    assert font.shape("Ţó")[1] == (490, 500)
+    master.removeKerning("Tcedilla", "@o")
+    assert "Tcedilla" not in master.hKerning
+    assert font.shape("Ţó")[1] == (470, 500)
+    # edits to the kerning in place are seen too
+    master.hKerning["T"]["o"] = -100
+    master.hKerning["Tcedilla"] = {"oacute": -5}
+    assert kerningFor(T, o, master) == -100
+    assert font.shape("Ţó")[1] == (495, 500)